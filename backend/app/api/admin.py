@@ -1,13 +1,15 @@
 import shutil
 import os
+import uuid
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from app.services import rag_service
+from app.services import rag_service, ingestion_jobs, user_cache, slots
 from app.api import deps
 from app.models.models import User, UserRole
+from app.schemas.ingestion import IngestionJob as IngestionJobSchema
 
 router = APIRouter()
 
-@router.post("/ingest")
+@router.post("/ingest", response_model=IngestionJobSchema, status_code=202)
 def ingest_documents(
     file: UploadFile = File(...),
     current_user: User = Depends(deps.get_current_user)
@@ -18,41 +20,94 @@ def ingest_documents(
 
     upload_dir = "uploads"
     os.makedirs(upload_dir, exist_ok=True)
-    
-    file_path = os.path.join(upload_dir, file.filename)
-    
+
+    # Jobs run concurrently, so two uploads of the same name must not share a path
+    file_path = os.path.join(upload_dir, f"{uuid.uuid4()}_{os.path.basename(file.filename)}")
+
     with open(file_path, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
-        
-    try:
-        num_chunks = rag_service.ingest_document(file_path)
-        return {"message": f"Successfully ingested {file.filename}", "chunks": num_chunks}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        # Cleanup uploaded file
-        if os.path.exists(file_path):
-            os.remove(file_path)
+
+    # The job removes the uploaded file once it is done with it
+    job = ingestion_jobs.submit(file.filename, file_path)
+    return job.to_dict()
+
+@router.get("/ingest/{job_id}", response_model=IngestionJobSchema)
+def read_ingestion_job(
+    job_id: str,
+    current_user: User = Depends(deps.get_current_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    job = ingestion_jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Ingestion job not found")
+    return job
+
+@router.get("/documents")
+def read_documents(
+    current_user: User = Depends(deps.get_current_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return rag_service.get_engine().list_documents()
+
+@router.delete("/documents/{document_id}")
+def delete_document(
+    document_id: str,
+    current_user: User = Depends(deps.get_current_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    removed = rag_service.get_engine().delete_document(document_id)
+    if not removed:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return {"message": "Document deleted", "chunks_removed": removed}
+
+@router.post("/index/compact")
+def compact_index(
+    current_user: User = Depends(deps.get_current_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return {"chunks": rag_service.get_engine().compact()}
+
+@router.get("/cache/stats")
+def read_cache_stats(
+    current_user: User = Depends(deps.get_current_user)
+):
+    if current_user.role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not authorized")
+
+    return {
+        "answer_cache": rag_service.get_engine().cache_stats(),
+        "user_cache": user_cache.stats(),
+        "slot_cache": slots.cache_stats(),
+    }
 
 from app.schemas.user import UserCreate, User as UserSchema
 from app.services import security
-from sqlalchemy.orm import Session
-from app.db.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_async_db
 from app.models.models import Expert
 
 class ExpertCreate(UserCreate):
     domain: str = "General"
 
 @router.post("/experts", response_model=UserSchema)
-def create_expert(
+async def create_expert(
     expert_in: ExpertCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(deps.get_current_user),
 ):
     if current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not authorized")
     
-    user = db.query(User).filter(User.email == expert_in.email).first()
+    user = (await db.execute(select(User).where(User.email == expert_in.email))).scalars().first()
     if user:
         raise HTTPException(
             status_code=400,
@@ -61,13 +116,13 @@ def create_expert(
         
     user = User(
         email=expert_in.email,
-        hashed_password=security.get_password_hash(expert_in.password),
+        hashed_password=await security.aget_password_hash(expert_in.password),
         full_name=expert_in.full_name,
         role=UserRole.EXPERT,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     
     expert = Expert(
         id=user.id,
@@ -76,6 +131,8 @@ def create_expert(
         verified=True # Admin created, so verified by default
     )
     db.add(expert)
-    db.commit()
+    await db.commit()
+    # The role changed: drop any principal cached for this id
+    user_cache.invalidate_user(user.id)
     
     return user
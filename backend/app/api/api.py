@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api import auth, admin, chat, consultations, availability, appointments, experts
+from app.api import auth, admin, chat, consultations, availability, appointments, experts, search, events
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["auth"])
@@ -9,5 +9,5 @@ api_router.include_router(consultations.router, prefix="/consultations", tags=["
 api_router.include_router(availability.router, prefix="/availability", tags=["availability"])
 api_router.include_router(appointments.router, prefix="/appointments", tags=["appointments"])
 api_router.include_router(experts.router, prefix="/experts", tags=["experts"])
-
-
+api_router.include_router(search.router, prefix="/search", tags=["search"])
+api_router.include_router(events.router, prefix="/events", tags=["events"])
@@ -1,25 +1,60 @@
+from datetime import datetime, timezone
 from typing import List, Any
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+import uuid
 from uuid import UUID
 
 from app.api import deps
-from app.db.database import get_db
-from app.models.models import User, UserRole, Appointment, AppointmentStatus
+from app.db.database import get_async_db
+from app.models.models import User, UserRole, Appointment, AppointmentStatus, UserEventType
 from app.schemas.appointment import AppointmentCreate, AppointmentUpdate, Appointment as AppointmentSchema
+from app.services import booking, notifications, slots
 
 router = APIRouter()
 
+async def reserve_slot(db: AsyncSession, expert_id, start_time, end_time, exclude_id=None):
+    try:
+        await booking.check_slot(db, expert_id, start_time, end_time, exclude_id)
+    except booking.BookingError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except LookupError as e:
+        await db.rollback()
+        raise HTTPException(status_code=404, detail=str(e))
+    except booking.BookingConflict as e:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail=str(e))
+
+async def commit_booking(db: AsyncSession):
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        # The Postgres exclusion constraint caught an overlap the checks missed
+        if booking.NO_OVERLAP_CONSTRAINT in str(e.orig):
+            raise HTTPException(status_code=409, detail="The expert already has an appointment at this time")
+        raise
+
 @router.post("/", response_model=AppointmentSchema)
-def create_appointment(
+async def create_appointment(
     appointment_in: AppointmentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(deps.get_current_user),
 ):
     """
-    Request a new appointment.
+    Request a new appointment. 409 if it overlaps another booking of the expert
+    or falls outside the expert's availability.
     """
+    if booking.ensure_aware(appointment_in.start_time) <= datetime.now(timezone.utc):
+        raise HTTPException(status_code=400, detail="Appointments must start in the future")
+    await reserve_slot(db, appointment_in.expert_id, appointment_in.start_time, appointment_in.end_time)
+
     appointment = Appointment(
+        # Set here rather than on flush: the creation event carries it
+        id=uuid.uuid4(),
         user_id=current_user.id,
         expert_id=appointment_in.expert_id,
         consultation_id=appointment_in.consultation_id,
@@ -28,35 +63,41 @@ def create_appointment(
         status=AppointmentStatus.PENDING
     )
     db.add(appointment)
-    db.commit()
-    db.refresh(appointment)
+    events = notifications.record(
+        db, [appointment.user_id, appointment.expert_id],
+        UserEventType.APPOINTMENT_CREATED, notifications.appointment_payload(appointment),
+    )
+    await commit_booking(db)
+    slots.invalidate_expert(appointment.expert_id)
+    await notifications.publish(events)
+    await db.refresh(appointment)
     return appointment
 
 @router.get("/me", response_model=List[AppointmentSchema])
-def read_my_appointments(
-    db: Session = Depends(get_db),
+async def read_my_appointments(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(deps.get_current_user),
 ):
     """
     Get appointments for the current user (either as client or expert).
     """
     if current_user.role == UserRole.EXPERT:
-        appointments = db.query(Appointment).filter(Appointment.expert_id == current_user.id).all()
+        query = select(Appointment).where(Appointment.expert_id == current_user.id)
     else:
-        appointments = db.query(Appointment).filter(Appointment.user_id == current_user.id).all()
-    return appointments
+        query = select(Appointment).where(Appointment.user_id == current_user.id)
+    return (await db.execute(query)).scalars().all()
 
 @router.patch("/{appointment_id}", response_model=AppointmentSchema)
-def update_appointment(
+async def update_appointment(
     appointment_id: UUID,
     appointment_in: AppointmentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(deps.get_current_user),
 ):
     """
     Update appointment status or time.
     """
-    appointment = db.query(Appointment).filter(Appointment.id == appointment_id).first()
+    appointment = await db.get(Appointment, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
         
@@ -64,6 +105,14 @@ def update_appointment(
     if current_user.id != appointment.user_id and current_user.id != appointment.expert_id:
         raise HTTPException(status_code=403, detail="Not authorized")
         
+    start_time = appointment_in.start_time or appointment.start_time
+    end_time = appointment_in.end_time or appointment.end_time
+    status = appointment_in.status or appointment.status
+    moved = appointment_in.start_time is not None or appointment_in.end_time is not None
+    reactivated = appointment.status not in booking.ACTIVE_STATUSES and status in booking.ACTIVE_STATUSES
+    if status in booking.ACTIVE_STATUSES and (moved or reactivated):
+        await reserve_slot(db, appointment.expert_id, start_time, end_time, exclude_id=appointment.id)
+
     if appointment_in.status:
         appointment.status = appointment_in.status
     if appointment_in.start_time:
@@ -72,7 +121,13 @@ def update_appointment(
         appointment.end_time = appointment_in.end_time
     if appointment_in.meeting_link:
         appointment.meeting_link = appointment_in.meeting_link
-        
-    db.commit()
-    db.refresh(appointment)
+
+    events = notifications.record(
+        db, [appointment.user_id, appointment.expert_id],
+        UserEventType.APPOINTMENT_UPDATED, notifications.appointment_payload(appointment),
+    )
+    await commit_booking(db)
+    slots.invalidate_expert(appointment.expert_id)
+    await notifications.publish(events)
+    await db.refresh(appointment)
     return appointment
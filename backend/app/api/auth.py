@@ -1,11 +1,12 @@
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
 from app.core.config import settings
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.models.models import User, Expert, UserRole
 from app.schemas.user import UserCreate, User as UserSchema, Token
 from app.services import security
@@ -13,13 +14,14 @@ from app.services import security
 router = APIRouter()
 
 @router.post("/login", response_model=Token)
-def login_access_token(
-    db: Session = Depends(get_db),
+async def login_access_token(
+    db: AsyncSession = Depends(get_async_db),
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     print(f"Login attempt: {form_data.username}")
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = (await db.execute(select(User).where(User.email == form_data.username))).scalars().first()
+    # Argon2 runs on the bounded hashing pool, off the event loop
+    if not user or not await security.averify_password(form_data.password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     
     access_token_expires = security.timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -31,12 +33,12 @@ def login_access_token(
     }
 
 @router.post("/register", response_model=UserSchema)
-def register_user(
+async def register_user(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user_in: UserCreate,
 ) -> Any:
-    user = db.query(User).filter(User.email == user_in.email).first()
+    user = (await db.execute(select(User).where(User.email == user_in.email))).scalars().first()
     if user:
         raise HTTPException(
             status_code=400,
@@ -44,18 +46,18 @@ def register_user(
         )
     user = User(
         email=user_in.email,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=await security.aget_password_hash(user_in.password),
         full_name=user_in.full_name,
         role=UserRole.USER,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
 
     return user
 
 @router.get("/me", response_model=UserSchema)
-def read_users_me(
+async def read_users_me(
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     return current_user
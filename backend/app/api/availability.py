@@ -1,30 +1,67 @@
-from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from datetime import date, datetime
+from typing import List, Any, Optional
+from zoneinfo import ZoneInfo
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
 from app.api import deps
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.models.models import User, UserRole, ExpertAvailability, Expert
-from app.schemas.availability import ExpertAvailabilityCreate, ExpertAvailability as ExpertAvailabilitySchema
+from app.core.config import settings
+from app.schemas.availability import ExpertAvailabilityCreate, ExpertAvailability as ExpertAvailabilitySchema, Slot
+from app.services import slots
 
 router = APIRouter()
 
+def slot_window_start(start: Optional[date]) -> date:
+    return start or datetime.now(ZoneInfo(settings.BOOKING_TIMEZONE)).date()
+
+@router.get("/slots", response_model=List[Slot])
+async def read_domain_slots(
+    domain: str,
+    start: Optional[date] = None,
+    days: int = Query(7, ge=1, le=31),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Bookable slots of every available expert in `domain`, sorted by time.
+    """
+    found = await slots.domain_slots(db, domain, slot_window_start(start), days)
+    return [Slot(expert_id=expert_id, start_time=slot_start, end_time=slot_end) for expert_id, slot_start, slot_end in found]
+
+@router.get("/{expert_id}/slots", response_model=List[Slot])
+async def read_expert_slots(
+    expert_id: UUID,
+    start: Optional[date] = None,
+    days: int = Query(7, ge=1, le=31),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Bookable slots of one expert from `start` (today by default) for `days` days:
+    availability rules expanded and booked appointments removed.
+    """
+    found = await slots.expert_slots(db, expert_id, slot_window_start(start), days)
+    return [Slot(expert_id=expert_id, start_time=slot_start, end_time=slot_end) for slot_start, slot_end in found]
+
 @router.get("/{expert_id}/availability", response_model=List[ExpertAvailabilitySchema])
-def read_expert_availability(
+async def read_expert_availability(
     expert_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get availability slots for a specific expert.
     """
-    availability = db.query(ExpertAvailability).filter(ExpertAvailability.expert_id == expert_id).all()
+    availability = (await db.execute(
+        select(ExpertAvailability).where(ExpertAvailability.expert_id == expert_id)
+    )).scalars().all()
     return availability
 
 @router.post("/me/availability", response_model=ExpertAvailabilitySchema)
-def create_availability(
+async def create_availability(
     availability_in: ExpertAvailabilityCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(deps.get_current_user),
 ):
     """
@@ -34,7 +71,7 @@ def create_availability(
         raise HTTPException(status_code=403, detail="Not authorized")
     
     # Verify expert profile exists
-    expert = db.query(Expert).filter(Expert.id == current_user.id).first()
+    expert = await db.get(Expert, current_user.id)
     if not expert:
         raise HTTPException(status_code=404, detail="Expert profile not found")
 
@@ -47,14 +84,15 @@ def create_availability(
         is_recurring=availability_in.is_recurring
     )
     db.add(availability)
-    db.commit()
-    db.refresh(availability)
+    await db.commit()
+    await db.refresh(availability)
+    slots.invalidate_expert(current_user.id)
     return availability
 
 @router.delete("/me/availability/{availability_id}")
-def delete_availability(
+async def delete_availability(
     availability_id: UUID,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(deps.get_current_user),
 ):
     """
@@ -63,14 +101,17 @@ def delete_availability(
     if current_user.role != UserRole.EXPERT:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    availability = db.query(ExpertAvailability).filter(
-        ExpertAvailability.id == availability_id,
-        ExpertAvailability.expert_id == current_user.id
-    ).first()
+    availability = (await db.execute(
+        select(ExpertAvailability).where(
+            ExpertAvailability.id == availability_id,
+            ExpertAvailability.expert_id == current_user.id
+        )
+    )).scalars().first()
     
     if not availability:
         raise HTTPException(status_code=404, detail="Availability slot not found")
         
-    db.delete(availability)
-    db.commit()
+    await db.delete(availability)
+    await db.commit()
+    slots.invalidate_expert(current_user.id)
     return {"message": "Availability slot deleted"}
@@ -1,111 +1,274 @@
-from fastapi import APIRouter, Depends, HTTPException
+import json
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.services import rag_service
 from app.api import deps
+from app.api.pagination import keyset_page, split_page
 from app.models.models import User, Conversation, Message, MessageRole
-from app.db.database import get_db
+from app.db.database import get_async_db, AsyncSessionLocal
 import uuid
 
 router = APIRouter()
 
+EMPTY_KNOWLEDGE_BASE_MESSAGE = "I'm sorry, my knowledge base is currently empty. Please ask an administrator to upload legal documents."
+
+# /history predates pagination; it now returns the latest messages only
+HISTORY_LIMIT = 100
+
 class ChatRequest(BaseModel):
     message: str
+    # Defaults to the user's most recent conversation
+    conversation_id: Optional[UUID] = None
 
 class MessageResponse(BaseModel):
+    id: Optional[UUID] = None
     role: str
     content: str
     sources: list = []
+    created_at: Optional[datetime] = None
+
+class MessagePage(BaseModel):
+    items: list[MessageResponse]
+    next_cursor: Optional[str] = None
+
+class ConversationCreate(BaseModel):
+    title: Optional[str] = None
+
+class ConversationResponse(BaseModel):
+    id: UUID
+    title: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class ConversationPage(BaseModel):
+    items: list[ConversationResponse]
+    next_cursor: Optional[str] = None
 
 class ChatResponse(BaseModel):
     response: str
     sources: list = []
+    conversation_id: Optional[UUID] = None
+
+def message_response(msg: Message) -> MessageResponse:
+    return MessageResponse(
+        id=msg.id,
+        role=msg.role,
+        content=msg.content,
+        sources=msg.citations if msg.citations else [],
+        created_at=msg.created_at,
+    )
+
+async def get_conversation(db: AsyncSession, user_id, conversation_id) -> Conversation:
+    conversation = await db.get(Conversation, conversation_id)
+    # Other users' conversations are reported as missing, not forbidden
+    if not conversation or conversation.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    return conversation
+
+async def get_or_create_conversation(db: AsyncSession, user_id) -> Conversation:
+    conversation = (await db.execute(
+        select(Conversation)
+        .where(Conversation.user_id == user_id)
+        .order_by(desc(Conversation.created_at))
+        .limit(1)
+    )).scalars().first()
+
+    if not conversation:
+        conversation = Conversation(user_id=user_id, title="New Chat")
+        db.add(conversation)
+        await db.commit()
+        await db.refresh(conversation)
+    return conversation
+
+async def save_assistant_message(conversation_id, content: str, sources: list):
+    # Short session of its own: no connection is held while the LLM answers
+    async with AsyncSessionLocal() as db:
+        db.add(Message(
+            conversation_id=conversation_id,
+            role=MessageRole.ASSISTANT,
+            content=content,
+            citations=sources
+        ))
+        await db.commit()
+
+async def stream_chat_events(conversation_id, message: str):
+    """
+    Yield (event, payload) pairs: sources first, then answer tokens, then done.
+    The full answer is persisted once the LLM stream ends.
+    """
+    answer_parts = []
+    sources = []
+    try:
+        async for kind, value in rag_service.get_engine().astream(message):
+            if kind == "sources":
+                sources = rag_service.format_sources(value)
+                yield "sources", {"sources": sources}
+            else:
+                answer_parts.append(value)
+                yield "token", {"token": value}
+    except rag_service.EmptyIndexError:
+        # Raised by the index snapshot, before any event was sent; anything
+        # failing once the answer streams is reported as an error below
+        yield "token", {"token": EMPTY_KNOWLEDGE_BASE_MESSAGE}
+        yield "done", {"response": EMPTY_KNOWLEDGE_BASE_MESSAGE, "sources": [], "conversation_id": str(conversation_id)}
+        return
+    except Exception as e:
+        print(f"Error in stream_chat_events: {e}")
+        yield "error", {"detail": str(e)}
+        return
+
+    answer = "".join(answer_parts)
+    await save_assistant_message(conversation_id, answer, sources)
+    yield "done", {"response": answer, "sources": sources, "conversation_id": str(conversation_id)}
+
+async def start_user_turn(db: AsyncSession, user_id, content: str, conversation_id=None) -> Conversation:
+    if conversation_id is not None:
+        conversation = await get_conversation(db, user_id, conversation_id)
+    else:
+        conversation = await get_or_create_conversation(db, user_id)
+    db.add(Message(
+        conversation_id=conversation.id,
+        role=MessageRole.USER,
+        content=content
+    ))
+    # Committing ends the transaction and hands the connection back to the pool
+    await db.commit()
+    return conversation
+
+@router.get("/conversations", response_model=ConversationPage)
+async def list_conversations(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    The user's conversations, newest first. Pass `next_cursor` back as `cursor` for the next page.
+    """
+    query = keyset_page(
+        select(Conversation).where(Conversation.user_id == current_user.id),
+        Conversation.created_at, Conversation.id, cursor, limit,
+    )
+    rows, next_cursor = split_page((await db.execute(query)).scalars().all(), limit)
+    return {"items": rows, "next_cursor": next_cursor}
+
+@router.post("/conversations", response_model=ConversationResponse, status_code=201)
+async def create_conversation(
+    conversation_in: ConversationCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    conversation = Conversation(user_id=current_user.id, title=conversation_in.title or "New Chat")
+    db.add(conversation)
+    await db.commit()
+    await db.refresh(conversation)
+    return conversation
+
+@router.get("/conversations/{conversation_id}/messages", response_model=MessagePage)
+async def list_messages(
+    conversation_id: UUID,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Latest messages first page; `next_cursor` pages back to older ones.
+    Each page is returned in chronological order, ready to prepend.
+    """
+    await get_conversation(db, current_user.id, conversation_id)
+    query = keyset_page(
+        select(Message).where(Message.conversation_id == conversation_id),
+        Message.created_at, Message.id, cursor, limit,
+    )
+    rows, next_cursor = split_page((await db.execute(query)).scalars().all(), limit)
+    return {"items": [message_response(msg) for msg in reversed(rows)], "next_cursor": next_cursor}
 
 @router.get("/history", response_model=list[MessageResponse])
-def get_chat_history(
-    db: Session = Depends(get_db),
+async def get_chat_history(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(deps.get_current_user)
 ):
-    # For now, we just get the most recent conversation or all messages flattened
-    # Simpler approach: Get the latest conversation's messages
-    conversation = db.query(Conversation).filter(
-        Conversation.user_id == current_user.id
-    ).order_by(desc(Conversation.created_at)).first()
-    
+    # Latest messages of the most recent conversation; older ones through
+    # /conversations/{id}/messages
+    conversation = (await db.execute(
+        select(Conversation)
+        .where(Conversation.user_id == current_user.id)
+        .order_by(desc(Conversation.created_at))
+        .limit(1)
+    )).scalars().first()
+
     if not conversation:
         return []
-        
-    messages = db.query(Message).filter(
-        Message.conversation_id == conversation.id
-    ).order_by(Message.created_at).all()
-    
-    return [
-        MessageResponse(
-            role=msg.role,
-            content=msg.content,
-            sources=msg.citations if msg.citations else []
-        ) for msg in messages
-    ]
+
+    query = keyset_page(
+        select(Message).where(Message.conversation_id == conversation.id),
+        Message.created_at, Message.id, None, HISTORY_LIMIT,
+    )
+    rows, _ = split_page((await db.execute(query)).scalars().all(), HISTORY_LIMIT)
+    return [message_response(msg) for msg in reversed(rows)]
 
 @router.post("/query", response_model=ChatResponse)
-def chat_query(
+async def chat_query(
     request: ChatRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(deps.get_current_user)
 ):
+    # Save user message; no transaction stays open during the LLM call
+    conversation_id = (await start_user_turn(db, current_user.id, request.message, request.conversation_id)).id
+
     try:
-        # Get or create conversation
-        conversation = db.query(Conversation).filter(
-            Conversation.user_id == current_user.id
-        ).order_by(desc(Conversation.created_at)).first()
-        
-        if not conversation:
-            conversation = Conversation(user_id=current_user.id, title="New Chat")
-            db.add(conversation)
-            db.commit()
-            db.refresh(conversation)
-
-        # Save user message
-        user_msg = Message(
-            conversation_id=conversation.id,
-            role=MessageRole.USER,
-            content=request.message
-        )
-        db.add(user_msg)
-        
         # Get AI response
-        result = rag_service.query_rag(request.message)
-        
+        result = await rag_service.aquery_rag(request.message)
+
         # Extract sources from context
-        sources = []
-        if "context" in result:
-            for doc in result["context"]:
-                sources.append({
-                    "content": doc.page_content[:200] + "...",
-                    "metadata": doc.metadata
-                })
-        
+        sources = rag_service.format_sources(result.get("context", []))
+
         # Save AI response
-        ai_msg = Message(
-            conversation_id=conversation.id,
-            role=MessageRole.ASSISTANT,
-            content=result["answer"],
-            citations=sources
-        )
-        db.add(ai_msg)
-        db.commit()
-                
+        await save_assistant_message(conversation_id, result["answer"], sources)
+
         return {
             "response": result["answer"],
-            "sources": sources
+            "sources": sources,
+            "conversation_id": conversation_id
         }
-    except ValueError as e:
+    except rag_service.EmptyIndexError:
         # Handle case where vector store is empty
         return {
-            "response": "I'm sorry, my knowledge base is currently empty. Please ask an administrator to upload legal documents.",
-            "sources": []
+            "response": EMPTY_KNOWLEDGE_BASE_MESSAGE,
+            "sources": [],
+            "conversation_id": conversation_id
         }
     except Exception as e:
         print(f"Error in chat_query: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/query/stream")
+async def chat_query_stream(
+    request: ChatRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Server-Sent Events variant of /query: `sources`, then `token` events, then `done`.
+    """
+    conversation_id = (await start_user_turn(db, current_user.id, request.message, request.conversation_id)).id
+
+    async def event_source():
+        async for event, payload in stream_chat_events(conversation_id, request.message):
+            yield f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        # Stop proxies from buffering the stream and defeating time-to-first-byte
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
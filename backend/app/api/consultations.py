@@ -1,19 +1,65 @@
-from typing import List, Any
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from typing import List, Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
 from app.api import deps
-from app.db.database import get_db
-from app.models.models import User, Consultation, UserRole, ConsultationStatus
+from app.api.pagination import keyset_page, split_page
+from app.db.database import get_async_db
+from app.models.models import User, Consultation, Expert, UserRole, ConsultationStatus, UserEventType
 from app.schemas.consultation import ConsultationCreate, Consultation as ConsultationSchema, ConsultationUpdate
+from app.services import notifications
+from app.services.consultations import open_pool
 
 router = APIRouter()
 
+# Attempts before reporting an empty queue when other experts keep winning the race
+CLAIM_ATTEMPTS = 5
+
+async def get_expert_domain(db: AsyncSession, user_id) -> Optional[str]:
+    expert = await db.get(Expert, user_id)
+    if not expert:
+        raise HTTPException(status_code=404, detail="Expert profile not found")
+    return expert.domain
+
+async def take_consultation(db: AsyncSession, consultation_id, expert_id, pool=None) -> bool:
+    """
+    Assign `consultation_id` to `expert_id` if it is still in `pool` (by default
+    any open, unassigned ticket) or already theirs and in progress. The condition
+    in the UPDATE makes this atomic even without row locks (SQLite).
+    """
+    if pool is None:
+        pool = (Consultation.status == ConsultationStatus.OPEN) & (Consultation.expert_id == None)
+    result = await db.execute(
+        update(Consultation)
+        .where(
+            Consultation.id == consultation_id,
+            or_(
+                pool,
+                (Consultation.expert_id == expert_id) & (Consultation.status == ConsultationStatus.IN_PROGRESS),
+            ),
+        )
+        .values(expert_id=expert_id, status=ConsultationStatus.IN_PROGRESS)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
+
+async def commit_assignment(db: AsyncSession, consultation_id) -> Consultation:
+    # Commit a successful take_consultation together with the events telling both sides
+    consultation = await db.get(Consultation, consultation_id, populate_existing=True)
+    events = notifications.record(
+        db, [consultation.user_id, consultation.expert_id],
+        UserEventType.CONSULTATION_ASSIGNED, notifications.consultation_payload(consultation),
+    )
+    await db.commit()
+    await notifications.publish(events)
+    return consultation
+
 @router.post("/", response_model=ConsultationSchema)
-def create_consultation(
+async def create_consultation(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     consultation_in: ConsultationCreate,
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
@@ -23,54 +69,93 @@ def create_consultation(
         status=ConsultationStatus.OPEN
     )
     db.add(consultation)
-    db.commit()
-    db.refresh(consultation)
+    await db.commit()
+    await db.refresh(consultation)
     return consultation
 
 @router.get("/", response_model=List[ConsultationSchema])
-def read_consultations(
-    db: Session = Depends(get_db),
-    skip: int = 0,
-    limit: int = 100,
+async def read_consultations(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=200),
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
+    """
+    Newest first. When there are more, the `X-Next-Cursor` header holds the
+    `cursor` to pass for the next page.
+    """
+    query = select(Consultation)
     if current_user.role == UserRole.EXPERT:
-        # Experts see tickets assigned to them or open tickets (simplified logic)
-        # For now, let's show all tickets to experts for simplicity, or just assigned ones
-        # Real logic: show assigned + pool of unassigned
-        return db.query(Consultation).filter(
-            (Consultation.expert_id == current_user.id) | (Consultation.expert_id == None)
-        ).offset(skip).limit(limit).all()
-    elif current_user.role == UserRole.ADMIN:
-        return db.query(Consultation).offset(skip).limit(limit).all()
-    else:
+        # Experts see their own tickets plus the open pool of their domain
+        domain = await get_expert_domain(db, current_user.id)
+        query = query.where(
+            (Consultation.expert_id == current_user.id) | open_pool(domain)
+        )
+    elif current_user.role != UserRole.ADMIN:
         # Users see their own tickets
-        return db.query(Consultation).filter(Consultation.user_id == current_user.id).offset(skip).limit(limit).all()
+        query = query.where(Consultation.user_id == current_user.id)
+    query = keyset_page(query, Consultation.created_at, Consultation.id, cursor, limit)
+    rows, next_cursor = split_page((await db.execute(query)).scalars().all(), limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return rows
+
+@router.post("/claim", response_model=ConsultationSchema, responses={204: {"description": "Queue is empty"}})
+async def claim_consultation(
+    *,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Hand the calling expert the oldest open consultation of their domain.
+    SKIP LOCKED lets concurrent experts each grab a different row instead of
+    queueing behind the same one.
+    """
+    if current_user.role != UserRole.EXPERT:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    domain = await get_expert_domain(db, current_user.id)
+
+    for _ in range(CLAIM_ATTEMPTS):
+        candidate = (await db.execute(
+            select(Consultation.id)
+            .where(open_pool(domain))
+            .order_by(Consultation.created_at, Consultation.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )).scalars().first()
+        if candidate is None:
+            await db.rollback()
+            return Response(status_code=status.HTTP_204_NO_CONTENT)
+        if await take_consultation(db, candidate, current_user.id, open_pool(domain)):
+            return await commit_assignment(db, candidate)
+        # Only without row locks: someone else took it between the SELECT and the UPDATE
+        await db.rollback()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.patch("/{id}/assign", response_model=ConsultationSchema)
-def assign_consultation(
+async def assign_consultation(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     id: UUID,
     current_user: User = Depends(deps.get_current_user),
 ) -> Any:
     if current_user.role != UserRole.EXPERT and current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not authorized")
-        
-    consultation = db.query(Consultation).filter(Consultation.id == id).first()
-    if not consultation:
-        raise HTTPException(status_code=404, detail="Consultation not found")
-        
-    consultation.expert_id = current_user.id
-    consultation.status = ConsultationStatus.IN_PROGRESS
-    db.commit()
-    db.refresh(consultation)
-    return consultation
+
+    # Experts take from the same pool they list; admins from any domain
+    pool = open_pool(await get_expert_domain(db, current_user.id)) if current_user.role == UserRole.EXPERT else None
+    if not await take_consultation(db, id, current_user.id, pool):
+        await db.rollback()
+        if not await db.get(Consultation, id):
+            raise HTTPException(status_code=404, detail="Consultation not found")
+        raise HTTPException(status_code=409, detail="Consultation is no longer open or already assigned to another expert")
+    return await commit_assignment(db, id)
 
 @router.patch("/{id}/reply", response_model=ConsultationSchema)
-def reply_consultation(
+async def reply_consultation(
     *,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     id: UUID,
     consultation_update: ConsultationUpdate,
     current_user: User = Depends(deps.get_current_user),
@@ -78,14 +163,19 @@ def reply_consultation(
     if current_user.role != UserRole.EXPERT and current_user.role != UserRole.ADMIN:
         raise HTTPException(status_code=403, detail="Not authorized")
         
-    consultation = db.query(Consultation).filter(Consultation.id == id).first()
+    consultation = await db.get(Consultation, id)
     if not consultation:
         raise HTTPException(status_code=404, detail="Consultation not found")
         
     if consultation_update.expert_response:
         consultation.expert_response = consultation_update.expert_response
         consultation.status = ConsultationStatus.RESOLVED
-        
-    db.commit()
-    db.refresh(consultation)
+
+    events = notifications.record(
+        db, [consultation.user_id, consultation.expert_id],
+        UserEventType.CONSULTATION_REPLIED, notifications.consultation_payload(consultation),
+    )
+    await db.commit()
+    await notifications.publish(events)
+    await db.refresh(consultation)
     return consultation
@@ -1,35 +1,53 @@
 from typing import Generator, Optional
+from uuid import UUID
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.models.models import User
 from app.schemas.user import TokenData
+from app.services import user_cache
 from app.services.security import ALGORITHM
+from app.services.user_cache import UserPrincipal
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/auth/login"
 )
 
-def get_current_user(
-    db: Session = Depends(get_db),
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+async def get_current_user(
+    db: AsyncSession = Depends(get_async_db),
     token: str = Depends(reusable_oauth2)
-) -> User:
+) -> UserPrincipal:
+    """
+    The authenticated user as a UserPrincipal (id, email, full_name, role).
+    Served from user_cache when possible, so most requests never touch the DB here.
+    """
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[ALGORITHM]
         )
         token_data = TokenData(**payload)
-    except (JWTError, ValidationError):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials",
-        )
-    user = db.query(User).filter(User.id == token_data.sub).first()
+        # A malformed subject is a bad token, not a server error
+        user_id = UUID(str(token_data.sub))
+    except (JWTError, ValidationError, ValueError):
+        raise credentials_exception
+    principal = user_cache.get(token_data.sub, token)
+    if principal is not None:
+        return principal
+
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    principal = UserPrincipal.from_user(user)
+    user_cache.put(token_data.sub, token, principal, payload.get("exp"))
+    return principal
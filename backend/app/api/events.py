@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, Query
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.core.config import settings
+from app.db.database import get_async_db
+from app.models.models import User
+from app.services import notifications
+
+router = APIRouter()
+
+class UserEventOut(BaseModel):
+    id: int
+    type: str
+    payload: dict[str, Any]
+    created_at: Optional[datetime] = None
+
+class UserEventPage(BaseModel):
+    items: list[UserEventOut]
+    # Pass as `after` to read the next page
+    last_id: int
+    # Where to resume from later, e.g. in the `subscribe_events` socket event; it
+    # stays behind recent events, which are re-sent so none that commits late is missed
+    cursor: int
+
+@router.get("/", response_model=UserEventPage)
+async def read_events(
+    after: Optional[int] = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=settings.USER_EVENTS_REPLAY_LIMIT),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """
+    The current user's events after `after`, oldest first. Without `after`,
+    no events and the cursor to start from for a client that has just loaded
+    its lists. Events are snapshots and may be delivered more than once.
+    """
+    if after is None:
+        cursor = await notifications.settled_event_id(db, current_user.id)
+        return {"items": [], "last_id": cursor, "cursor": cursor}
+    events = await notifications.events_after(db, current_user.id, after, limit)
+    last_id = events[-1].id if events else after
+    return {
+        "items": [notifications.serialize(event) for event in events],
+        "last_id": last_id,
+        "cursor": max(after, await notifications.settled_event_id(db, current_user.id, up_to=last_id)),
+    }
@@ -1,21 +1,22 @@
 from typing import List, Any
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.models.models import User, UserRole, Expert
 from app.schemas.user import User as UserSchema
 
 router = APIRouter()
 
 @router.get("/", response_model=List[UserSchema])
-def read_experts(
-    db: Session = Depends(get_db),
+async def read_experts(
+    db: AsyncSession = Depends(get_async_db),
     current_user: User = Depends(deps.get_current_user),
 ):
     """
     Retrieve all users with the role 'expert'.
     """
-    experts = db.query(User).filter(User.role == UserRole.EXPERT).all()
+    experts = (await db.execute(select(User).where(User.role == UserRole.EXPERT))).scalars().all()
     return experts
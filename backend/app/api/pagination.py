@@ -0,0 +1,57 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+def _encode(data: dict) -> str:
+    raw = json.dumps(data)
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def _decode(cursor: str) -> dict:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+
+def encode_cursor(created_at: datetime, id) -> str:
+    return _encode({"created_at": created_at.isoformat(), "id": str(id)})
+
+def decode_cursor(cursor: str):
+    try:
+        data = _decode(cursor)
+        return datetime.fromisoformat(data["created_at"]), UUID(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def encode_rank_cursor(rank: float, id) -> str:
+    # For pages ordered by a relevance score instead of time
+    return _encode({"rank": rank, "id": str(id)})
+
+def decode_rank_cursor(cursor: str):
+    try:
+        data = _decode(cursor)
+        return float(data["rank"]), UUID(data["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_page(query, created_at_column, id_column, cursor: Optional[str], limit: int):
+    """
+    Newest-first page of `query`, strictly after `cursor` in that order.
+    Seeks through a (created_at, id) index, so the cost does not grow with the
+    number of rows before the cursor the way OFFSET does.
+    Fetches one extra row to know whether there is a next page.
+    """
+    if cursor:
+        created_at, id = decode_cursor(cursor)
+        query = query.where(tuple_(created_at_column, id_column) < tuple_(created_at, id))
+    return query.order_by(created_at_column.desc(), id_column.desc()).limit(limit + 1)
+
+def split_page(rows: list, limit: int):
+    """
+    (rows of this page, cursor of the next page or None)
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
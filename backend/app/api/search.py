@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api import deps
+from app.api.consultations import get_expert_domain
+from app.api.pagination import decode_rank_cursor, encode_rank_cursor
+from app.db.database import get_async_db
+from app.models.models import User, UserRole
+from app.services import search as search_service
+from app.services.search import SEARCH_SCOPES, SearchScope
+
+router = APIRouter()
+
+class SearchHit(BaseModel):
+    id: UUID
+    title: str
+    # Matching fragments with the query terms wrapped in <mark>
+    headline: str
+    rank: float
+    timestamp: Optional[datetime] = None
+
+class SearchPage(BaseModel):
+    scope: str
+    items: list[SearchHit]
+    next_cursor: Optional[str] = None
+
+@router.get("/", response_model=SearchPage)
+async def search(
+    q: str = Query(..., min_length=2, max_length=200),
+    scope: str = SearchScope.LEGAL_SOURCES,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """
+    Full-text search in one scope (consultations, messages or legal_sources),
+    best match first. Users only find their own consultations and messages.
+    """
+    if scope not in SEARCH_SCOPES:
+        raise HTTPException(status_code=400, detail=f"scope must be one of {SEARCH_SCOPES}")
+    after = decode_rank_cursor(cursor) if cursor else None
+    domain = None
+    if scope == SearchScope.CONSULTATIONS and current_user.role == UserRole.EXPERT:
+        domain = await get_expert_domain(db, current_user.id)
+
+    rows = await search_service.search(db, scope, q, current_user, limit, after, domain)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_rank_cursor(rows[-1][3], rows[-1][0])
+    return {
+        "scope": scope,
+        "items": [
+            SearchHit(id=id, title=title, headline=headline, rank=rank, timestamp=timestamp)
+            for id, title, headline, rank, timestamp in rows
+        ],
+        "next_cursor": next_cursor,
+    }
@@ -22,12 +22,129 @@ class Settings(BaseSettings):
             return v
         return f"postgresql://{values.get('POSTGRES_USER')}:{values.get('POSTGRES_PASSWORD')}@{values.get('POSTGRES_SERVER')}/{values.get('POSTGRES_DB')}"
 
+    # Connection pool, per engine and per worker (ignored for SQLite)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_PRE_PING: bool = True
+    # Recycle connections before Postgres or a proxy drops idle ones
+    DB_POOL_RECYCLE: int = 1800
+
+    # Same database through an async driver; derived from DATABASE_URL when not set
+    ASYNC_DATABASE_URL: Union[str, None] = None
+
+    @validator("ASYNC_DATABASE_URL", pre=True, always=True)
+    def assemble_async_db_connection(cls, v: Union[str, None], values: dict[str, any]) -> any:
+        if isinstance(v, str):
+            return v
+        url = values.get("DATABASE_URL") or ""
+        for sync_prefix, async_prefix in (
+            ("postgresql+psycopg2://", "postgresql+asyncpg://"),
+            ("postgresql://", "postgresql+asyncpg://"),
+            ("sqlite://", "sqlite+aiosqlite://"),
+        ):
+            if url.startswith(sync_prefix):
+                return async_prefix + url[len(sync_prefix):]
+        return url
+
     # CORS
     BACKEND_CORS_ORIGINS: List[AnyHttpUrl] = []
 
     # Gemini
     GOOGLE_API_KEY: str = ""
 
+    # Semantic answer cache
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_SIMILARITY: float = 0.95
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_CACHE_MAX_ENTRIES: int = 1024
+
+    # Appointments: availability "HH:MM" rules are wall-clock times in this zone
+    BOOKING_TIMEZONE: str = "Africa/Casablanca"
+    BOOKING_SLOT_MINUTES: int = 60
+    # Bookable slots per expert, per worker; invalidated on availability or appointment changes
+    SLOT_CACHE_TTL_SECONDS: int = 60
+    SLOT_CACHE_MAX_EXPERTS: int = 1000
+
+    # Argon2 password hashing (passlib defaults). Existing hashes keep verifying after a change
+    ARGON2_TIME_COST: int = 2
+    ARGON2_MEMORY_COST: int = 102400  # KiB
+    ARGON2_PARALLELISM: int = 8
+    # Hashes run on their own small pool; requests beyond workers + queue get a 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE: int = 32
+
+    # Authenticated user principals, per worker; bounds how long a role change can lag
+    USER_CACHE_ENABLED: bool = True
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_ENTRIES: int = 10000
+
+    # Socket.IO across workers: memory (single worker), redis, postgres (LISTEN/NOTIFY) or local
+    SOCKETIO_MANAGER: str = "memory"
+    # Redis URL, Postgres URL (defaults to DATABASE_URL) or the local broker's socket path
+    SOCKETIO_MESSAGE_QUEUE: Union[str, None] = None
+    SOCKETIO_CHANNEL: str = "socketio"
+    # Long-polling needs sticky sessions behind a load balancer; websocket-only does not
+    SOCKETIO_TRANSPORTS: List[str] = ["websocket"]
+    SOCKETIO_MAX_MESSAGE_BYTES: int = 65536
+
+    # Signaling limits, per connection
+    SIGNALING_MAX_PAYLOAD_BYTES: int = 16384 # SDP offers and answers
+    SIGNALING_MAX_CANDIDATE_BYTES: int = 2048
+    SIGNALING_RATE_PER_SECOND: float = 20.0
+    SIGNALING_BURST: int = 60 # ICE candidates arrive in bursts during call setup
+    SIGNALING_MAX_VIOLATIONS: int = 50 # Rejected events before the socket is disconnected
+
+    # Per-user event log behind push notifications
+    USER_EVENTS_REPLAY_LIMIT: int = 500 # Events per replay batch
+    USER_EVENTS_SETTLE_SECONDS: int = 30 # Cursors stay behind events this recent; they may commit out of order
+    USER_EVENTS_RETENTION_DAYS: int = 30
+
+    # Background ingestion
+    INGEST_WORKERS: int = 1
+    INGEST_JOB_HISTORY: int = 100
+    INGEST_JOB_DIR: str = "ingest_jobs" # Job status files, shared by every worker on the host
+
+    # Embedding during ingestion
+    EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_CACHE_PATH: Union[str, None] = "embedding_cache.sqlite3" # None disables the cache
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_STREAM_CHUNKS: int = 512 # Chunks written to the index per step
+    EMBEDDING_THREADS: int = 0 # torch intra-op threads, 0 = torch default
+    EMBEDDING_PROCESSES: int = 0 # > 1 starts a process pool of that many CPU workers
+
+    # Vector index (Flat, IVFFlat, HNSW, IVFPQ); run migrate_index.py after changing the type
+    FAISS_INDEX_TYPE: str = "Flat"
+    FAISS_IVF_NLIST: int = 1024
+    FAISS_IVF_NPROBE: int = 16
+    FAISS_HNSW_M: int = 32
+    FAISS_HNSW_EF_CONSTRUCTION: int = 200
+    FAISS_HNSW_EF_SEARCH: int = 64
+    FAISS_PQ_M: int = 16 # Must divide the embedding dimension (384 for MiniLM)
+    FAISS_PQ_NBITS: int = 8
+    FAISS_TRAIN_SAMPLE: int = 50000
+    # IVF lists are sized from the corpus the index is trained on, i.e. the first
+    # upload: after a bulk load run compact_index.py to retrain on everything.
+    # Ingestion also retrains once the index grows this many times past it
+    FAISS_RETRAIN_GROWTH: float = 4.0
+
+    # Chunk store (SQLite next to the FAISS index)
+    CHUNK_STORE_MMAP_BYTES: int = 1 << 30
+    INDEX_RELOAD_SECONDS: float = 5.0 # How often workers check for an index written by another worker
+
+    # Chunking and retrieval; benchmarks/eval_retrieval.py compares settings.
+    # Re-ingest the corpus after changing the chunk size or overlap
+    RAG_CHUNK_SIZE: int = 1000 # Characters per chunk
+    RAG_CHUNK_OVERLAP: int = 200
+    RAG_TOP_K: int = 4 # Chunks passed to the LLM per question
+
+    # Hybrid retrieval (BM25 fused with dense search by reciprocal rank fusion)
+    HYBRID_SEARCH_ENABLED: bool = True
+    HYBRID_DENSE_WEIGHT: float = 1.0
+    HYBRID_LEXICAL_WEIGHT: float = 1.0
+    HYBRID_RRF_K: int = 60
+    HYBRID_CANDIDATES: int = 20 # Candidates taken from each retriever before fusion
+
     model_config = SettingsConfigDict(case_sensitive=True, env_file=".env")
 
 settings = Settings()
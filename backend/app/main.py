@@ -1,8 +1,11 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import settings
 import socketio
 from app.socket_events import sio
+from app.db.database import AsyncSessionLocal
+from app.services import notifications, rag_service, security
 
 fastapi_app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -31,8 +34,33 @@ fastapi_app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Keyset pagination of list endpoints that return a bare JSON array
+    expose_headers=["X-Next-Cursor"],
 )
 
+@fastapi_app.on_event("startup")
+def load_retrieval_engine():
+    # Load the embedding model, FAISS index and LLM client once per worker
+    rag_service.init_engine()
+
+@fastapi_app.on_event("startup")
+async def prune_user_events():
+    # Retention of the notification log; a failure must not keep the worker from starting
+    try:
+        async with AsyncSessionLocal() as db:
+            await notifications.prune(db)
+    except Exception as e:
+        print(f"Could not prune user events: {e}")
+
+@fastapi_app.exception_handler(security.PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: security.PasswordHasherBusy):
+    # Backpressure from the Argon2 pool: clients should retry shortly
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Too many login attempts in progress, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
 @fastapi_app.get("/")
 def root():
     return {"message": "Welcome to Jurid-AI API"}
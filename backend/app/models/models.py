@@ -1,8 +1,8 @@
 import uuid
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Text, Enum, JSON
+from sqlalchemy import BigInteger, Column, String, Boolean, Date, DateTime, ForeignKey, Integer, Text, Enum, JSON, Index, SmallInteger, Time
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from app.db.database import Base
 import enum
 
@@ -41,6 +41,10 @@ class User(Base):
     consultations = relationship("Consultation", back_populates="user")
     appointments = relationship("Appointment", back_populates="user")
 
+    __table_args__ = (
+        Index("ix_users_role", "role"),
+    )
+
 class Expert(Base):
     __tablename__ = "experts"
 
@@ -54,6 +58,11 @@ class Expert(Base):
     availability = relationship("ExpertAvailability", back_populates="expert")
     appointments = relationship("Appointment", back_populates="expert")
 
+    __table_args__ = (
+        # Slot search across every expert of a domain
+        Index("ix_experts_domain", "domain"),
+    )
+
 class LegalSource(Base):
     __tablename__ = "legal_sources"
 
@@ -75,6 +84,11 @@ class Conversation(Base):
     user = relationship("User", back_populates="conversations")
     messages = relationship("Message", back_populates="conversation")
 
+    __table_args__ = (
+        # Keyset pagination of a user's conversations, newest first
+        Index("ix_conversations_user_created_id", "user_id", "created_at", "id"),
+    )
+
 class Message(Base):
     __tablename__ = "messages"
 
@@ -87,6 +101,11 @@ class Message(Base):
 
     conversation = relationship("Conversation", back_populates="messages")
 
+    __table_args__ = (
+        # Keyset pagination of a conversation's messages
+        Index("ix_messages_conversation_created_id", "conversation_id", "created_at", "id"),
+    )
+
 class Consultation(Base):
     __tablename__ = "consultations"
 
@@ -95,6 +114,8 @@ class Consultation(Base):
     expert_id = Column(UUID(as_uuid=True), ForeignKey("experts.id"), nullable=True)
     subject = Column(String, nullable=False)
     description = Column(Text, nullable=False)
+    # Legal domain, matched against Expert.domain when claiming; NULL means any expert
+    domain = Column(String, nullable=True)
     status = Column(String, default=ConsultationStatus.OPEN)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     expert_response = Column(Text, nullable=True)
@@ -102,6 +123,18 @@ class Consultation(Base):
     user = relationship("User", back_populates="consultations")
     expert = relationship("Expert", back_populates="consultations")
 
+    __table_args__ = (
+        # A user's tickets; an expert's assigned tickets; the open pool
+        Index("ix_consultations_user_created", "user_id", "created_at"),
+        Index("ix_consultations_expert_status", "expert_id", "status"),
+        Index("ix_consultations_status_created", "status", "created_at"),
+        # The unclaimed queue, per domain, oldest first
+        Index(
+            "ix_consultations_open_queue", "domain", "created_at",
+            postgresql_where=text("status = 'open' AND expert_id IS NULL"),
+        ),
+    )
+
 class AppointmentStatus(str, enum.Enum):
     PENDING = "pending"
     EXPERT_PROPOSED_NEW_TIME = "expert_proposed_new_time"
@@ -115,14 +148,18 @@ class ExpertAvailability(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     expert_id = Column(UUID(as_uuid=True), ForeignKey("experts.id"), nullable=False)
-    day_of_week = Column(String, nullable=True) # 0=Monday, 6=Sunday
-    specific_date = Column(DateTime, nullable=True) # For specific overrides
-    start_time = Column(String, nullable=False) # Format "HH:MM"
-    end_time = Column(String, nullable=False) # Format "HH:MM"
+    day_of_week = Column(SmallInteger, nullable=True) # 0=Monday, 6=Sunday
+    specific_date = Column(Date, nullable=True) # For specific overrides
+    start_time = Column(Time, nullable=False) # Wall-clock time in BOOKING_TIMEZONE
+    end_time = Column(Time, nullable=False)
     is_recurring = Column(Boolean, default=True)
 
     expert = relationship("Expert", back_populates="availability")
 
+    __table_args__ = (
+        Index("ix_expert_availability_expert", "expert_id"),
+    )
+
 class Appointment(Base):
     __tablename__ = "appointments"
 
@@ -139,3 +176,40 @@ class Appointment(Base):
     user = relationship("User", back_populates="appointments")
     expert = relationship("Expert", back_populates="appointments")
     consultation = relationship("Consultation")
+
+    __table_args__ = (
+        # Calendars of a user or an expert, ordered by time
+        Index("ix_appointments_user_start", "user_id", "start_time"),
+        Index("ix_appointments_expert_start", "expert_id", "start_time"),
+        Index("ix_appointments_consultation", "consultation_id"),
+    )
+
+class UserEventType(str, enum.Enum):
+    APPOINTMENT_CREATED = "appointment.created"
+    APPOINTMENT_UPDATED = "appointment.updated"
+    CONSULTATION_ASSIGNED = "consultation.assigned"
+    CONSULTATION_REPLIED = "consultation.replied"
+
+class UserEvent(Base):
+    """
+    State change pushed to one user, written in the same transaction as the
+    change. The increasing id is the cursor clients replay from after a reconnect.
+    """
+    __tablename__ = "user_events"
+
+    # SQLite only auto-increments INTEGER PRIMARY KEY
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    type = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Load created_at on insert: events are pushed right after the commit
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        # Replay of a user's events after a cursor
+        Index("ix_user_events_user_id", "user_id", "id"),
+        # Retention cleanup
+        Index("ix_user_events_created", "created_at"),
+    )
@@ -1,17 +1,24 @@
 from typing import Optional
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, Field, model_validator
+from datetime import date, datetime, time
 from uuid import UUID
 
 class ExpertAvailabilityBase(BaseModel):
-    day_of_week: Optional[str] = None
-    specific_date: Optional[datetime] = None
-    start_time: str
-    end_time: str
+    # 0=Monday, 6=Sunday
+    day_of_week: Optional[int] = Field(None, ge=0, le=6)
+    specific_date: Optional[date] = None
+    start_time: time
+    end_time: time
     is_recurring: bool = True
 
 class ExpertAvailabilityCreate(ExpertAvailabilityBase):
-    pass
+    @model_validator(mode="after")
+    def check_rule(self):
+        if self.end_time <= self.start_time:
+            raise ValueError("end_time must be after start_time")
+        if self.day_of_week is None and self.specific_date is None:
+            raise ValueError("Either day_of_week or specific_date is required")
+        return self
 
 class ExpertAvailability(ExpertAvailabilityBase):
     id: UUID
@@ -19,3 +26,8 @@ class ExpertAvailability(ExpertAvailabilityBase):
 
     class Config:
         from_attributes = True
+
+class Slot(BaseModel):
+    expert_id: UUID
+    start_time: datetime
+    end_time: datetime
@@ -7,6 +7,7 @@ from app.models.models import ConsultationStatus
 class ConsultationBase(BaseModel):
     subject: str
     description: str
+    domain: Optional[str] = None
 
 class ConsultationCreate(ConsultationBase):
     pass
@@ -0,0 +1,20 @@
+from typing import Optional
+from pydantic import BaseModel
+from datetime import datetime
+
+class IngestionJob(BaseModel):
+    id: str
+    filename: str
+    status: str
+    pages_loaded: int
+    chunks_total: int
+    chunks_embedded: int
+    chunks_per_second: float
+    embedding_cache_hits: int
+    document_id: Optional[str] = None
+    document_status: Optional[str] = None # created, updated, unchanged, duplicate
+    chunks_removed: int
+    index_state: str
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
@@ -0,0 +1,87 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+
+class SemanticAnswerCache:
+    """
+    LRU + TTL cache of LLM answers keyed by question embedding.
+    A lookup hits when the cosine similarity with a stored question reaches `threshold`.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: int = 3600, max_entries: int = 1024):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (vector, answer, context, stored_at)
+        self._keys = itertools.count()
+        # Stacked vectors of all entries, rebuilt lazily after writes
+        self._matrix = None
+        self._matrix_keys = []
+
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _evict_expired(self, now: float):
+        expired = [key for key, entry in self._entries.items() if now - entry[3] > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+        if expired:
+            self._matrix = None
+
+    def get(self, vector):
+        query = self._normalize(vector)
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            if self._entries:
+                if self._matrix is None:
+                    self._matrix_keys = list(self._entries.keys())
+                    self._matrix = np.stack([self._entries[key][0] for key in self._matrix_keys])
+                scores = self._matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    key = self._matrix_keys[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    _, answer, context, _ = self._entries[key]
+                    return {"answer": answer, "context": context}
+            self.misses += 1
+            return None
+
+    def put(self, vector, answer: str, context: list, generation: int):
+        with self._lock:
+            # The index changed while this answer was being generated
+            if generation != self.generation:
+                return
+            self._entries[next(self._keys)] = (self._normalize(vector), answer, context, time.monotonic())
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+            self.generation += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "generation": self.generation,
+            }
@@ -0,0 +1,160 @@
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import List
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (term, slot)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_postings_term_tf ON postings (term, tf DESC);
+CREATE INDEX IF NOT EXISTS ix_postings_slot ON postings (slot);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS bm25_stats (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+# BM25 parameters (Robertson defaults)
+K1 = 1.2
+B = 0.75
+# Only the highest-tf postings of a term are scored; bounds the cost of common terms
+MAX_POSTINGS_PER_TERM = 5000
+
+def _fold(text: str) -> str:
+    folded = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in folded if not unicodedata.combining(ch))
+
+STOPWORDS = set(_fold("""
+a au aux avec ce ces cette dans de des du elle en et il ils je la le les leur lui ma mais me
+meme mes moi mon ne nos notre nous on ou par pas pour qu que qui sa se ses son sur ta te tes
+toi ton tu un une vos votre vous est sont ete etre avoir a l d s n y
+the of and to in is are for on with by as or be at an this that it from
+في من على إلى عن أن ما لا التي الذي هذا هذه او أو و
+""").split())
+
+ARTICLE_WORDS = {_fold(word) for word in ["article", "art", "articles", "الفصل", "المادة"]}
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase, accent-folded word tokens. "article 53" also yields "art:53" so
+    exact article references score much higher than the two words on their own.
+    """
+    words = re.findall(r"\w+", _fold(text))
+
+    tokens = []
+    for i, word in enumerate(words):
+        if word not in STOPWORDS:
+            tokens.append(word)
+        if word in ARTICLE_WORDS and i + 1 < len(words) and words[i + 1][:1].isdigit():
+            tokens.append(f"art:{words[i + 1]}")
+    return tokens
+
+class BM25Index:
+    """
+    Inverted index stored in the chunk store's SQLite file, keyed by the same
+    slot ids as the FAISS index. Updated incrementally as chunks are added or removed.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.chunks.conn.executescript(SCHEMA)
+        self.chunks.conn.commit()
+
+    @property
+    def conn(self):
+        return self.chunks.conn
+
+    def _bump_stats(self, docs: int, length: int):
+        self.conn.executemany(
+            "INSERT INTO bm25_stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            [("docs", docs), ("length", length)],
+        )
+
+    def add(self, slots, texts: List[str]):
+        postings, df = [], Counter()
+        total_length = 0
+        for slot, text in zip(slots, texts):
+            counts = Counter(tokenize(text))
+            length = sum(counts.values())
+            total_length += length
+            for term, tf in counts.items():
+                postings.append((term, int(slot), tf, length))
+                df[term] += 1
+        self.conn.executemany("INSERT OR REPLACE INTO postings (term, slot, tf, length) VALUES (?, ?, ?, ?)", postings)
+        self.conn.executemany(
+            "INSERT INTO terms (term, df) VALUES (?, ?) ON CONFLICT(term) DO UPDATE SET df = df + excluded.df",
+            list(df.items()),
+        )
+        self._bump_stats(len(texts), total_length)
+
+    def remove(self, slots: List[int]):
+        if not slots:
+            return
+        slots = [int(slot) for slot in slots]
+        placeholders = ",".join("?" * len(slots))
+        rows = self.conn.execute(
+            f"SELECT term, slot, length FROM postings WHERE slot IN ({placeholders})", slots
+        ).fetchall()
+        if not rows:
+            return
+        df = Counter(term for term, _, _ in rows)
+        lengths = {slot: length for _, slot, length in rows}
+        self.conn.executemany("UPDATE terms SET df = df - ? WHERE term = ?", [(count, term) for term, count in df.items()])
+        self.conn.execute("DELETE FROM terms WHERE df <= 0")
+        self.conn.execute(f"DELETE FROM postings WHERE slot IN ({placeholders})", slots)
+        self._bump_stats(-len(lengths), -sum(lengths.values()))
+
+    def rebuild(self, rows):
+        """
+        Rebuild from (slot, text) rows, e.g. all live chunks of an existing corpus.
+        """
+        self.conn.execute("DELETE FROM postings")
+        self.conn.execute("DELETE FROM terms")
+        self.conn.execute("DELETE FROM bm25_stats")
+        rows = list(rows)
+        self.add([slot for slot, _ in rows], [text for _, text in rows])
+
+    def search(self, query: str, k: int) -> List[int]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        stats = dict(self.conn.execute("SELECT name, value FROM bm25_stats").fetchall())
+        num_docs = stats.get("docs", 0)
+        if num_docs <= 0:
+            return []
+        avg_length = stats.get("length", 0) / num_docs or 1.0
+
+        scores = Counter()
+        for term in terms:
+            row = self.conn.execute("SELECT df FROM terms WHERE term = ?", (term,)).fetchone()
+            if row is None:
+                continue
+            idf = math.log(1 + (num_docs - row[0] + 0.5) / (row[0] + 0.5))
+            postings = self.conn.execute(
+                "SELECT slot, tf, length FROM postings WHERE term = ? ORDER BY tf DESC LIMIT ?",
+                (term, MAX_POSTINGS_PER_TERM),
+            )
+            for slot, tf, length in postings:
+                scores[slot] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_length))
+        return [slot for slot, _ in scores.most_common(k)]
+
+def reciprocal_rank_fusion(rankings, rrf_k: int = 60) -> List[int]:
+    """
+    Fuse ranked slot lists given as (slots, weight) pairs.
+    """
+    scores = Counter()
+    for slots, weight in rankings:
+        for rank, slot in enumerate(slots):
+            scores[slot] += weight / (rrf_k + rank + 1)
+    return [slot for slot, _ in scores.most_common()]
@@ -0,0 +1,130 @@
+import asyncio
+from datetime import date, datetime, timezone
+from typing import Dict
+from zoneinfo import ZoneInfo
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.models import Appointment, AppointmentStatus, Expert, ExpertAvailability
+
+# Statuses that hold the expert's time; cancelled and completed ones do not
+ACTIVE_STATUSES = [
+    AppointmentStatus.PENDING,
+    AppointmentStatus.EXPERT_PROPOSED_NEW_TIME,
+    AppointmentStatus.USER_PROPOSED_NEW_TIME,
+    AppointmentStatus.CONFIRMED,
+]
+
+# Name of the exclusion constraint added by migration 0003 (Postgres only)
+NO_OVERLAP_CONSTRAINT = "appointments_no_overlap"
+
+# SQLite ignores FOR UPDATE: bookings of one expert are serialized in-process
+# instead, from check_slot until the transaction ends
+_expert_locks: Dict[str, asyncio.Lock] = {}
+HELD_LOCKS = "booking_expert_locks"
+
+class BookingError(Exception):
+    """
+    The requested interval is malformed (start after end, in the past, ...).
+    """
+
+class BookingConflict(Exception):
+    """
+    The requested interval overlaps another booking or falls outside the expert's availability.
+    """
+
+def rules_for_day(rules: list, day: date) -> list:
+    """
+    Availability rules that apply on `day`. Rules for a specific date replace
+    the recurring ones for that date.
+    """
+    specific = [rule for rule in rules if rule.specific_date == day]
+    if specific:
+        return specific
+    return [rule for rule in rules if rule.specific_date is None and rule.day_of_week == day.weekday()]
+
+def _rules_cover(rules: list, start: datetime, end: datetime) -> bool:
+    if start.date() != end.date():
+        return False
+    return any(
+        rule.start_time <= start.time() and end.time() <= rule.end_time
+        for rule in rules_for_day(rules, start.date())
+    )
+
+def ensure_aware(value: datetime) -> datetime:
+    # Naive datetimes from clients are taken as UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+@event.listens_for(Session, "after_transaction_end")
+def _release_expert_locks(session, transaction):
+    if transaction.parent is None:
+        for lock in session.info.pop(HELD_LOCKS, {}).values():
+            lock.release()
+
+async def lock_expert(db: AsyncSession, expert_id) -> Expert:
+    """
+    Row-lock the expert for the rest of the transaction. Concurrent bookings for
+    the same expert queue up here, so check-then-insert cannot race.
+    """
+    if db.bind.dialect.name == "sqlite":
+        held = db.info.setdefault(HELD_LOCKS, {})
+        key = str(expert_id)
+        if key not in held:
+            lock = _expert_locks.setdefault(key, asyncio.Lock())
+            await lock.acquire()
+            held[key] = lock
+    return (await db.execute(
+        select(Expert).where(Expert.id == expert_id).with_for_update()
+    )).scalars().first()
+
+async def find_overlap(db: AsyncSession, expert_id, start: datetime, end: datetime, exclude_id=None):
+    """
+    The active appointment of `expert_id` overlapping [start, end), if any.
+
+    Active appointments of an expert never overlap each other, so sorted by
+    start they are also sorted by end: the only candidate is the latest one
+    starting before `end`. That is a single seek on (expert_id, start_time).
+    """
+    query = (
+        select(Appointment)
+        .where(
+            Appointment.expert_id == expert_id,
+            Appointment.status.in_(ACTIVE_STATUSES),
+            Appointment.start_time < end,
+        )
+        .order_by(Appointment.start_time.desc())
+        .limit(1)
+    )
+    if exclude_id is not None:
+        query = query.where(Appointment.id != exclude_id)
+    candidate = (await db.execute(query)).scalars().first()
+    if candidate is not None and ensure_aware(candidate.end_time) > start:
+        return candidate
+    return None
+
+async def check_availability(db: AsyncSession, expert_id, start: datetime, end: datetime):
+    rules = (await db.execute(
+        select(ExpertAvailability).where(ExpertAvailability.expert_id == expert_id)
+    )).scalars().all()
+    # Experts who never declared availability accept any time
+    if not rules:
+        return
+    zone = ZoneInfo(settings.BOOKING_TIMEZONE)
+    local_start, local_end = start.astimezone(zone), end.astimezone(zone)
+    if not _rules_cover(rules, local_start, local_end):
+        raise BookingConflict("The requested time is outside the expert's availability")
+
+async def check_slot(db: AsyncSession, expert_id, start: datetime, end: datetime, exclude_id=None):
+    """
+    Validate [start, end) for `expert_id` inside the caller's transaction.
+    Takes the expert row lock; commit or roll back to release it.
+    """
+    start, end = ensure_aware(start), ensure_aware(end)
+    if end <= start:
+        raise BookingError("end_time must be after start_time")
+    if await lock_expert(db, expert_id) is None:
+        raise LookupError("Expert not found")
+    await check_availability(db, expert_id, start, end)
+    if await find_overlap(db, expert_id, start, end, exclude_id) is not None:
+        raise BookingConflict("The expert already has an appointment at this time")
@@ -0,0 +1,151 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List
+from langchain_core.documents import Document
+from app.core.config import settings
+
+class ChunkState:
+    LIVE = 1
+    # Removed from the document but still in an index that cannot delete vectors
+    TOMBSTONED = 0
+    # Removed from the index; the row only stays for workers still on an older index
+    REMOVED = -1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    slot INTEGER PRIMARY KEY,
+    chunk_id TEXT NOT NULL,
+    document_id TEXT,
+    content TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    state INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS ix_chunks_document_state ON chunks (document_id, state);
+CREATE TABLE IF NOT EXISTS documents (
+    id TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    content_hash TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_documents_content_hash ON documents (content_hash);
+"""
+
+class ChunkStore:
+    """
+    SQLite file holding chunk text and metadata, addressed by the int64 slot id
+    each vector has in the FAISS index. Workers only read the rows of their top-k
+    hits; the file itself is shared through the OS page cache (mmap).
+
+    Rows are append-only between compactions, so a worker still searching an
+    older index never points at a missing row.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.commit()
+        self._local.conn = conn
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute(f"PRAGMA mmap_size={settings.CHUNK_STORE_MMAP_BYTES}")
+        return conn
+
+    @property
+    def conn(self):
+        # One connection per thread: readers never wait on each other
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def fetch(self, slots: List[int]) -> List[Document]:
+        """
+        Live chunks for `slots`, in the same order; dead or unknown slots are skipped.
+        """
+        if not slots:
+            return []
+        placeholders = ",".join("?" * len(slots))
+        rows = self.conn.execute(
+            f"SELECT slot, content, metadata FROM chunks WHERE slot IN ({placeholders}) AND state = ?",
+            [*slots, ChunkState.LIVE],
+        ).fetchall()
+        by_slot = {slot: Document(page_content=content, metadata=json.loads(metadata)) for slot, content, metadata in rows}
+        return [by_slot[slot] for slot in slots if slot in by_slot]
+
+    def next_slot(self) -> int:
+        return self.conn.execute("SELECT COALESCE(MAX(slot), -1) + 1 FROM chunks").fetchone()[0]
+
+    def insert(self, slots: Iterable[int], chunk_ids: List[str], texts: List[str], metadatas: List[dict]):
+        self.conn.executemany(
+            "INSERT INTO chunks (slot, chunk_id, document_id, content, metadata, state) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (int(slot), chunk_id, metadata.get("document_id"), text, json.dumps(metadata), ChunkState.LIVE)
+                for slot, chunk_id, text, metadata in zip(slots, chunk_ids, texts, metadatas)
+            ],
+        )
+
+    def set_state(self, slots: List[int], state: int):
+        self.conn.executemany("UPDATE chunks SET state = ? WHERE slot = ?", [(state, int(slot)) for slot in slots])
+
+    def chunks_of(self, doc_id: str, state: int) -> Dict[str, int]:
+        rows = self.conn.execute(
+            "SELECT chunk_id, slot FROM chunks WHERE document_id = ? AND state = ?", (doc_id, state)
+        )
+        return dict(rows.fetchall())
+
+    def contents(self, slots: List[int]):
+        if not slots:
+            return []
+        placeholders = ",".join("?" * len(slots))
+        return self.conn.execute(
+            f"SELECT slot, content FROM chunks WHERE slot IN ({placeholders})", [int(slot) for slot in slots]
+        ).fetchall()
+
+    def live_chunks(self):
+        return self.conn.execute(
+            "SELECT slot, content FROM chunks WHERE state = ? ORDER BY slot", (ChunkState.LIVE,)
+        ).fetchall()
+
+    def count(self, state: int) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM chunks WHERE state = ?", (state,)).fetchone()[0]
+
+    def purge_dead(self) -> int:
+        return self.conn.execute("DELETE FROM chunks WHERE state != ?", (ChunkState.LIVE,)).rowcount
+
+    def put_document(self, doc_id: str, source: str, content_hash: str):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO documents (id, source, content_hash) VALUES (?, ?, ?)",
+            (doc_id, source, content_hash),
+        )
+
+    def delete_document(self, doc_id: str) -> bool:
+        return self.conn.execute("DELETE FROM documents WHERE id = ?", (doc_id,)).rowcount > 0
+
+    def document_hash(self, doc_id: str):
+        row = self.conn.execute("SELECT content_hash FROM documents WHERE id = ?", (doc_id,)).fetchone()
+        return row[0] if row else None
+
+    def document_with_hash(self, content_hash: str):
+        row = self.conn.execute("SELECT id FROM documents WHERE content_hash = ?", (content_hash,)).fetchone()
+        return row[0] if row else None
+
+    def documents(self) -> list:
+        rows = self.conn.execute(
+            """
+            SELECT d.id, d.source, COUNT(c.slot)
+            FROM documents d LEFT JOIN chunks c ON c.document_id = d.id AND c.state = ?
+            GROUP BY d.id, d.source
+            """,
+            (ChunkState.LIVE,),
+        )
+        return [{"document_id": doc_id, "source": source, "chunks": chunks} for doc_id, source, chunks in rows]
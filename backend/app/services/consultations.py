@@ -0,0 +1,17 @@
+from typing import Optional
+from sqlalchemy import or_
+from app.models.models import Consultation, ConsultationStatus
+
+# Shared by the consultation list, the claim queue and search, so an expert
+# finds exactly the tickets they can list
+
+def domain_filter(domain: Optional[str]):
+    # Tickets without a domain can go to any expert
+    return or_(Consultation.domain == domain, Consultation.domain == None)
+
+def open_pool(domain: Optional[str]):
+    return (
+        (Consultation.status == ConsultationStatus.OPEN)
+        & (Consultation.expert_id == None)
+        & domain_filter(domain)
+    )
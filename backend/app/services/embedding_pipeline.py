@@ -0,0 +1,86 @@
+import time
+from typing import Iterator, List, Tuple
+from app.core.config import settings
+
+def configure_torch_threads():
+    # Intra-op threads used by every in-process encode call
+    if settings.EMBEDDING_THREADS > 0:
+        import torch
+        torch.set_num_threads(settings.EMBEDDING_THREADS)
+
+class EmbeddingPipeline:
+    """
+    Embeds chunks in fixed-size batches and hands them out in blocks of
+    `stream_size`, so the index grows while the rest is still being encoded.
+    With `processes` > 1 a sentence-transformers process pool spreads the work
+    across CPU cores for the whole run. Chunks already in `cache` are not re-encoded.
+    """
+
+    def __init__(self, embeddings, batch_size: int = None, stream_size: int = None, processes: int = None, cache=None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        self.stream_size = stream_size or settings.EMBEDDING_STREAM_CHUNKS
+        self.processes = settings.EMBEDDING_PROCESSES if processes is None else processes
+        self.chunks_embedded = 0
+        self.cache_hits = 0
+        self.elapsed = 0.0
+        self._pool = None
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.chunks_embedded / self.elapsed if self.elapsed else 0.0
+
+    def _model(self):
+        # HuggingFaceEmbeddings exposes the SentenceTransformer as `client`;
+        # any other Embeddings implementation goes through embed_documents
+        client = getattr(self.embeddings, "client", None)
+        return client if hasattr(client, "encode") else None
+
+    def _encode(self, model, texts: List[str]) -> List[List[float]]:
+        if model is None:
+            return self.embeddings.embed_documents(texts)
+
+        encode_kwargs = dict(getattr(self.embeddings, "encode_kwargs", {}) or {})
+        encode_kwargs["batch_size"] = self.batch_size
+        if self.processes > 1:
+            # Started on the first cache miss so a fully cached run never pays for it
+            if self._pool is None:
+                self._pool = model.start_multi_process_pool(target_devices=["cpu"] * self.processes)
+            vectors = model.encode_multi_process(texts, self._pool, **encode_kwargs)
+        else:
+            vectors = model.encode(texts, **encode_kwargs)
+        return [vector.tolist() for vector in vectors]
+
+    def _encode_uncached(self, model, texts: List[str]) -> List[List[float]]:
+        if self.cache is None:
+            return self._encode(model, texts)
+
+        vectors = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        self.cache_hits += len(texts) - len(missing)
+        if missing:
+            missing_texts = [texts[i] for i in missing]
+            encoded = self._encode(model, missing_texts)
+            self.cache.put_many(missing_texts, encoded)
+            for i, vector in zip(missing, encoded):
+                vectors[i] = vector
+        return vectors
+
+    def run(self, texts: List[str]) -> Iterator[Tuple[int, int, List[List[float]]]]:
+        """
+        Yield (start, end, vectors) for consecutive blocks of `texts`.
+        """
+        model = self._model()
+        started = time.perf_counter()
+        try:
+            for start in range(0, len(texts), self.stream_size):
+                end = min(start + self.stream_size, len(texts))
+                vectors = self._encode_uncached(model, texts[start:end])
+                self.chunks_embedded += end - start
+                self.elapsed = time.perf_counter() - started
+                yield start, end, vectors
+        finally:
+            if self._pool is not None:
+                model.stop_multi_process_pool(self._pool)
+                self._pool = None
@@ -0,0 +1,108 @@
+import math
+import faiss
+import numpy as np
+from app.core.config import settings
+
+class IndexType:
+    FLAT = "Flat"
+    IVF_FLAT = "IVFFlat"
+    HNSW = "HNSW"
+    IVF_PQ = "IVFPQ"
+
+INDEX_TYPES = [IndexType.FLAT, IndexType.IVF_FLAT, IndexType.HNSW, IndexType.IVF_PQ]
+
+def effective_nlist(nlist: int, num_vectors: int) -> int:
+    # FAISS wants roughly 39 training points per centroid; small corpora get fewer lists
+    return max(1, min(nlist, num_vectors // 39, int(4 * math.sqrt(max(num_vectors, 1)))))
+
+def factory_string(index_type: str, num_vectors: int = None, params: dict = None) -> str:
+    params = {**default_params(), **(params or {})}
+    nlist = params["nlist"] if num_vectors is None else effective_nlist(params["nlist"], num_vectors)
+
+    if index_type == IndexType.FLAT:
+        return "Flat"
+    if index_type == IndexType.IVF_FLAT:
+        return f"IVF{nlist},Flat"
+    if index_type == IndexType.HNSW:
+        return f"HNSW{params['hnsw_m']}"
+    if index_type == IndexType.IVF_PQ:
+        return f"IVF{nlist},PQ{params['pq_m']}x{params['pq_nbits']}"
+    raise ValueError(f"Unknown FAISS index type: {index_type}. Expected one of {INDEX_TYPES}")
+
+def default_params() -> dict:
+    return {
+        "nlist": settings.FAISS_IVF_NLIST,
+        "nprobe": settings.FAISS_IVF_NPROBE,
+        "hnsw_m": settings.FAISS_HNSW_M,
+        "ef_construction": settings.FAISS_HNSW_EF_CONSTRUCTION,
+        "ef_search": settings.FAISS_HNSW_EF_SEARCH,
+        "pq_m": settings.FAISS_PQ_M,
+        "pq_nbits": settings.FAISS_PQ_NBITS,
+    }
+
+def needs_training(index_type: str) -> bool:
+    return index_type in (IndexType.IVF_FLAT, IndexType.IVF_PQ)
+
+def build_index(dimension: int, index_type: str = None, num_vectors: int = None, params: dict = None):
+    """
+    Build an empty (possibly untrained) index. `num_vectors` is the expected corpus
+    size and caps the number of IVF lists.
+    """
+    index_type = index_type or settings.FAISS_INDEX_TYPE
+    params = {**default_params(), **(params or {})}
+    if index_type == IndexType.IVF_PQ and num_vectors is not None and num_vectors < 39 * 2 ** params["pq_nbits"]:
+        # Too few vectors to train the PQ codebooks; PQ only pays off on large corpora anyway
+        print(f"Only {num_vectors} vectors: falling back from {IndexType.IVF_PQ} to {IndexType.IVF_FLAT}")
+        index_type = IndexType.IVF_FLAT
+    index = faiss.index_factory(dimension, factory_string(index_type, num_vectors, params), faiss.METRIC_L2)
+    if index_type == IndexType.HNSW:
+        index.hnsw.efConstruction = params["ef_construction"]
+    # Vectors are addressed by stable int64 slot ids rather than by insertion order.
+    # IVF lists store those ids themselves; under an IndexIDMap2, remove_ids would
+    # compact the id map while IVF keeps its own numbering, and hits would
+    # resolve to the wrong slots
+    if not needs_training(index_type):
+        index = faiss.IndexIDMap2(index)
+    return configure_search(index, params)
+
+def base_index(index):
+    # The index under the slot id map, if there is one
+    return faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+
+def supports_removal(index) -> bool:
+    """
+    Whether remove_ids leaves every other slot id intact: true for a flat index
+    under the id map and for a bare IVF index. HNSW cannot remove, and indexes
+    built before IVF dropped the id map would corrupt it; both tombstone instead.
+    """
+    if isinstance(index, faiss.IndexIDMap):
+        return isinstance(base_index(index), faiss.IndexFlat)
+    return True
+
+def ivf_lists(index):
+    # nlist of an IVF index, None for other types
+    try:
+        return faiss.extract_index_ivf(base_index(index)).nlist
+    except RuntimeError:
+        return None
+
+def configure_search(index, params: dict = None):
+    # Reapplied after every load so changed search settings take effect without a rebuild
+    params = {**default_params(), **(params or {})}
+    base = base_index(index)
+    try:
+        faiss.extract_index_ivf(base).nprobe = params["nprobe"]
+    except RuntimeError:
+        pass
+    if hasattr(base, "hnsw"):
+        base.hnsw.efSearch = params["ef_search"]
+    return index
+
+def train(index, vectors: np.ndarray, sample_size: int = None):
+    if index.is_trained:
+        return
+    sample_size = sample_size or settings.FAISS_TRAIN_SAMPLE
+    if len(vectors) > sample_size:
+        rng = np.random.default_rng(0)
+        vectors = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    index.train(np.ascontiguousarray(vectors, dtype=np.float32))
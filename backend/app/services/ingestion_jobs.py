@@ -0,0 +1,128 @@
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+from app.core.config import settings
+from app.services import rag_service
+
+class JobStatus:
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+class IndexState:
+    PENDING = "pending"
+    EMBEDDING = "embedding"
+    RETRAINING = "retraining"
+    COMMITTING = "committing"
+    COMMITTED = "committed"
+
+class IngestionJob:
+    """
+    Progress of one upload. Every update is written to a status file in
+    INGEST_JOB_DIR, so any worker can answer a poll for the job.
+    """
+
+    def __init__(self, filename: str, file_path: str):
+        self.id = str(uuid.uuid4())
+        self.filename = filename
+        self.file_path = file_path
+        self.status = JobStatus.QUEUED
+        self.pages_loaded = 0
+        self.chunks_total = 0
+        self.chunks_embedded = 0
+        self.chunks_per_second = 0.0
+        self.embedding_cache_hits = 0
+        self.document_id = None
+        self.document_status = None
+        self.chunks_removed = 0
+        self.index_state = IndexState.PENDING
+        self.error = None
+        self.created_at = datetime.utcnow()
+        self.finished_at = None
+
+    def update(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.save()
+
+    def save(self):
+        path = _job_path(self.id)
+        # Write then rename: a poll never reads a half-written file
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.to_dict(), f, default=datetime.isoformat)
+        os.replace(path + ".tmp", path)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "pages_loaded": self.pages_loaded,
+            "chunks_total": self.chunks_total,
+            "chunks_embedded": self.chunks_embedded,
+            "chunks_per_second": self.chunks_per_second,
+            "embedding_cache_hits": self.embedding_cache_hits,
+            "document_id": self.document_id,
+            "document_status": self.document_status,
+            "chunks_removed": self.chunks_removed,
+            "index_state": self.index_state,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+# Ingestion runs on its own small pool so it never occupies the request threadpool;
+# chat queries keep reading the current index until the new one is swapped in.
+_executor = ThreadPoolExecutor(max_workers=settings.INGEST_WORKERS, thread_name_prefix="ingest")
+
+def _job_path(job_id: str) -> str:
+    return os.path.join(settings.INGEST_JOB_DIR, f"{job_id}.json")
+
+def _run(job: IngestionJob):
+    job.update(status=JobStatus.RUNNING)
+    try:
+        result = rag_service.ingest_document(job.file_path, progress=job.update, source=job.filename)
+        job.update(status=JobStatus.COMPLETED, document_status=result["status"])
+    except Exception as e:
+        print(f"Ingestion job {job.id} failed: {e}")
+        job.update(status=JobStatus.FAILED, error=str(e))
+    finally:
+        job.update(finished_at=datetime.utcnow())
+        # Cleanup uploaded file
+        if os.path.exists(job.file_path):
+            os.remove(job.file_path)
+
+def _prune():
+    # Only keep the most recent jobs around for status polling; running ones stay
+    entries = sorted(
+        (entry for entry in os.scandir(settings.INGEST_JOB_DIR) if entry.name.endswith(".json")),
+        key=lambda entry: entry.stat().st_mtime,
+    )
+    for entry in entries[:max(0, len(entries) - settings.INGEST_JOB_HISTORY)]:
+        job = get_job(entry.name[:-len(".json")])
+        if job is not None and job["finished_at"] is not None:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+def submit(filename: str, file_path: str) -> IngestionJob:
+    os.makedirs(settings.INGEST_JOB_DIR, exist_ok=True)
+    job = IngestionJob(filename, file_path)
+    job.save()
+    _prune()
+    _executor.submit(_run, job)
+    return job
+
+def get_job(job_id: str) -> Optional[dict]:
+    try:
+        # Also keeps the id from naming a path outside the job directory
+        job_id = str(uuid.UUID(job_id))
+        with open(_job_path(job_id)) as f:
+            return json.load(f)
+    except (ValueError, OSError):
+        return None
@@ -0,0 +1,61 @@
+import os
+import pickle
+from pathlib import PureWindowsPath
+import faiss
+import numpy as np
+from app.services import index_factory
+from app.services.vector_store import (
+    INDEX_FILE, LEGACY_DOCSTORE_FILE, LegalVectorStore, chunk_ids, content_hash, document_id, write_lock
+)
+
+def migrate(path: str) -> bool:
+    """
+    Convert an index written by langchain's FAISS.save_local (index.faiss plus
+    the index.pkl docstore) to the chunk store layout, in place. Returns False
+    when there was nothing to migrate. Safe to call from several workers at once.
+    """
+    legacy_path = os.path.join(path, LEGACY_DOCSTORE_FILE)
+    with write_lock(path):
+        # Another worker may have migrated it while this one waited
+        if not os.path.exists(legacy_path):
+            return False
+
+        index = faiss.read_index(os.path.join(path, INDEX_FILE))
+        # The file was written by this application; this is the last time it gets unpickled
+        with open(legacy_path, "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        vectors = index.reconstruct_n(0, index.ntotal)
+        docs = [docstore.search(index_to_docstore_id[i]) for i in range(index.ntotal)]
+        print(f"Migrating {len(docs)} chunks to the SQLite chunk store...")
+
+        by_source = {}
+        for position, doc in enumerate(docs):
+            # Stored paths may be Windows ones; uploads are keyed by the bare file name
+            source = PureWindowsPath(doc.metadata.get("source", "legacy")).name
+            by_source.setdefault(source, []).append(position)
+
+        # Keep the flat layout; migrate_index.py switches index types afterwards
+        vector_store = LegalVectorStore(path, index_factory.build_index(index.d, index_type=index_factory.IndexType.FLAT))
+        next_slot = 0
+        for source, positions in by_source.items():
+            doc_id = document_id(source)
+            texts = [docs[position].page_content for position in positions]
+            ids = chunk_ids(doc_id, texts)
+            metadatas = [
+                {**docs[position].metadata, "source": source, "document_id": doc_id, "chunk_id": chunk_id}
+                for position, chunk_id in zip(positions, ids)
+            ]
+            slots = np.arange(next_slot, next_slot + len(positions), dtype=np.int64)
+            next_slot += len(positions)
+
+            vector_store.index.add_with_ids(np.ascontiguousarray(vectors[positions]), slots)
+            vector_store.chunks.insert(slots, ids, texts, metadatas)
+            vector_store.lexical.add(slots, texts)
+            vector_store.chunks.put_document(doc_id, source, content_hash(texts))
+            print(f"  {source}: {len(positions)} chunks")
+
+        vector_store.manifest["next_slot"] = next_slot
+        vector_store.save()
+        os.rename(legacy_path, legacy_path + ".migrated")
+    print("Docstore migrated successfully.")
+    return True
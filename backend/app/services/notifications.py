@@ -0,0 +1,107 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+from sqlalchemy import delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.models import UserEvent
+
+logger = logging.getLogger(__name__)
+
+def user_room(user_id) -> str:
+    # Every socket of a user joins this room on connect, on whichever worker
+    return f"user:{user_id}"
+
+def _isoformat(value):
+    return value.isoformat() if value is not None else None
+
+def appointment_payload(appointment) -> dict:
+    return {
+        "id": str(appointment.id),
+        "user_id": str(appointment.user_id),
+        "expert_id": str(appointment.expert_id),
+        "consultation_id": str(appointment.consultation_id) if appointment.consultation_id else None,
+        "start_time": _isoformat(appointment.start_time),
+        "end_time": _isoformat(appointment.end_time),
+        "status": appointment.status,
+        "meeting_link": appointment.meeting_link,
+    }
+
+def consultation_payload(consultation) -> dict:
+    return {
+        "id": str(consultation.id),
+        "user_id": str(consultation.user_id),
+        "expert_id": str(consultation.expert_id) if consultation.expert_id else None,
+        "subject": consultation.subject,
+        "status": consultation.status,
+        "expert_response": consultation.expert_response,
+    }
+
+def serialize(event: UserEvent) -> dict:
+    return {
+        "id": event.id,
+        "type": event.type,
+        "payload": event.payload,
+        "created_at": _isoformat(event.created_at),
+    }
+
+def record(db: AsyncSession, user_ids: Iterable, event_type: str, payload: dict) -> List[UserEvent]:
+    """
+    Add one event per user to the session, so it commits with the state change
+    it describes. Pass the result to `publish` after the commit.
+    """
+    events = [
+        UserEvent(user_id=user_id, type=event_type, payload=payload)
+        for user_id in dict.fromkeys(user_id for user_id in user_ids if user_id is not None)
+    ]
+    db.add_all(events)
+    return events
+
+async def publish(events: List[UserEvent]):
+    """
+    Push committed events to their users' sockets. A missed push is not lost:
+    clients replay from their last event id when they reconnect.
+    """
+    # Imported lazily: socket_events imports this module
+    from app.socket_events import sio
+
+    for event in events:
+        try:
+            await sio.emit("user_event", serialize(event), room=user_room(event.user_id))
+        except Exception:
+            logger.exception("Could not push user event %s", event.id)
+
+async def events_after(db: AsyncSession, user_id, after: int, limit: int) -> List[UserEvent]:
+    query = (
+        select(UserEvent)
+        .where(UserEvent.user_id == user_id, UserEvent.id > after)
+        .order_by(UserEvent.id)
+        .limit(limit)
+    )
+    return list((await db.execute(query)).scalars().all())
+
+async def settled_event_id(db: AsyncSession, user_id, up_to: Optional[int] = None) -> int:
+    """
+    Highest event id of the user that is safe to resume from. Ids are allocated
+    at insert but become visible at commit, so id N can commit after N + 1: a
+    cursor past an event younger than USER_EVENTS_SETTLE_SECONDS could skip
+    such a straggler. Replays from this cursor re-send the recent events;
+    clients drop the ones they already applied.
+    """
+    settled_before = datetime.now(timezone.utc) - timedelta(seconds=settings.USER_EVENTS_SETTLE_SECONDS)
+    query = select(func.max(UserEvent.id)).where(UserEvent.user_id == user_id, UserEvent.created_at < settled_before)
+    if up_to is not None:
+        query = query.where(UserEvent.id <= up_to)
+    return (await db.execute(query)).scalar() or 0
+
+async def prune(db: AsyncSession) -> int:
+    """
+    Delete events past USER_EVENTS_RETENTION_DAYS. A client whose cursor is
+    older than that refetches its lists instead of replaying.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.USER_EVENTS_RETENTION_DAYS)
+    result = await db.execute(
+        delete(UserEvent).where(UserEvent.created_at < cutoff).execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
@@ -1,81 +1,308 @@
+import asyncio
 import os
+import threading
+import time
 from typing import List
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 from langchain_core.prompts import ChatPromptTemplate
 from app.core.config import settings
+from app.services.answer_cache import SemanticAnswerCache
+from app.services.embedding_cache import EmbeddingCache
+from app.services.embedding_pipeline import EmbeddingPipeline, configure_torch_threads
+from app.services.vector_store import LegalVectorStore, write_lock
 
-# Global variable to hold the vector store in memory for simplicity
-# In production, you might want to load this on startup or use a persistent server
-vector_store = None
 FAISS_INDEX_PATH = "faiss_index"
 
+PROMPT_TEMPLATE = """
+    You are an expert Moroccan Legal Assistant named Jurid-AI.
+    Answer the user's question based ONLY on the following context.
+    If the answer is not in the context, say "I do not have enough information in my legal database to answer this question."
+    Always cite the specific article numbers or source titles if available in the context.
+
+    Context:
+    {context}
+
+    Question: {input}
+    """
+
 def get_embeddings():
-    return HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
+    configure_torch_threads()
+    return HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL)
+
+def get_llm():
+    return ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key=settings.GOOGLE_API_KEY, temperature=0)
+
+class EmptyIndexError(ValueError):
+    """No document has been ingested yet."""
+
+class RetrievalEngine:
+    """
+    Long-lived owner of the embedding model, the FAISS store and the LLM client.
+    Built once per worker; the index can be swapped in place after ingestion.
+    """
+
+    def __init__(self, index_path: str = FAISS_INDEX_PATH, embeddings=None, llm=None):
+        self.index_path = index_path
+        self.embeddings = embeddings or get_embeddings()
+        self.llm = llm or get_llm()
+        self.prompt = ChatPromptTemplate.from_template(PROMPT_TEMPLATE)
+        self.document_chain = create_stuff_documents_chain(self.llm, self.prompt)
+        self.answer_cache = SemanticAnswerCache(
+            threshold=settings.ANSWER_CACHE_SIMILARITY,
+            ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+            max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+        ) if settings.ANSWER_CACHE_ENABLED else None
+
+        # The lock only guards the current store; queries run outside it
+        self._lock = threading.RLock()
+        # Serializes writers so two ingestions never race on the index files
+        self._ingest_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._vector_store = None
+        self._embedding_cache = None
+        self._loaded_mtime = None
+        self._checked_at = 0.0
+
+        self.load_index()
+
+    @property
+    def vector_store(self):
+        with self._lock:
+            return self._vector_store
+
+    def load_index(self):
+        mtime = LegalVectorStore.manifest_mtime(self.index_path)
+        vector_store = LegalVectorStore.load(self.index_path)
+        if vector_store is not None:
+            self.swap_index(vector_store)
+        self._loaded_mtime = mtime
+
+    def _reload_if_changed(self):
+        # Another worker may have committed a new index; pick it up without a restart
+        now = time.monotonic()
+        if now - self._checked_at < settings.INDEX_RELOAD_SECONDS:
+            return
+        self._checked_at = now
+        if LegalVectorStore.manifest_mtime(self.index_path) != self._loaded_mtime:
+            # Never wait here: a slow reload elsewhere must not stall queries
+            if not self._reload_lock.acquire(blocking=False):
+                return
+            try:
+                self.load_index()
+            finally:
+                self._reload_lock.release()
+
+    def swap_index(self, vector_store: LegalVectorStore):
+        with self._lock:
+            self._vector_store = vector_store
+            # Cached answers were grounded in the previous index
+            if self.answer_cache is not None:
+                self.answer_cache.invalidate()
+
+    def _snapshot(self):
+        with self._lock:
+            store = self._vector_store
+            generation = self.answer_cache.generation if self.answer_cache is not None else 0
+        if store is None:
+            raise EmptyIndexError("Vector store not found. Please ingest documents first.")
+        return store, generation
+
+    def _cached(self, vector):
+        if self.answer_cache is None:
+            return None
+        return self.answer_cache.get(vector)
+
+    def _remember(self, vector, answer: str, docs: list, generation: int):
+        if self.answer_cache is not None:
+            self.answer_cache.put(vector, answer, docs, generation)
+
+    def query(self, input_text: str):
+        self._reload_if_changed()
+        store, generation = self._snapshot()
+        # Embed once: the vector serves both the cache lookup and the search
+        vector = self.embeddings.embed_query(input_text)
+
+        cached = self._cached(vector)
+        if cached is not None:
+            return {"input": input_text, "context": cached["context"], "answer": cached["answer"]}
+
+        docs = store.search(vector, input_text, k=settings.RAG_TOP_K)
+        answer = self.document_chain.invoke({"input": input_text, "context": docs})
+        self._remember(vector, answer, docs, generation)
+        return {"input": input_text, "context": docs, "answer": answer}
+
+    async def aquery(self, input_text: str):
+        """
+        Async counterpart of `query`: embedding and search run in the default
+        executor and the LLM call is awaited, so a slow answer holds no thread.
+        """
+        # A reload reads the index from disk: keep it off the event loop
+        await asyncio.to_thread(self._reload_if_changed)
+        store, generation = self._snapshot()
+        vector = await self.embeddings.aembed_query(input_text)
+
+        cached = self._cached(vector)
+        if cached is not None:
+            return {"input": input_text, "context": cached["context"], "answer": cached["answer"]}
+
+        docs = await store.asearch(vector, input_text, k=settings.RAG_TOP_K)
+        answer = await self.document_chain.ainvoke({"input": input_text, "context": docs})
+        self._remember(vector, answer, docs, generation)
+        return {"input": input_text, "context": docs, "answer": answer}
+
+    async def astream(self, input_text: str):
+        """
+        Yield ("sources", docs) once retrieval is done, then ("token", text)
+        for every chunk the LLM streams back.
+        """
+        await asyncio.to_thread(self._reload_if_changed)
+        store, generation = self._snapshot()
+        vector = await self.embeddings.aembed_query(input_text)
+
+        cached = self._cached(vector)
+        if cached is not None:
+            yield "sources", cached["context"]
+            yield "token", cached["answer"]
+            return
+
+        docs = await store.asearch(vector, input_text, k=settings.RAG_TOP_K)
+        yield "sources", docs
+
+        answer_parts = []
+        async for token in self.document_chain.astream({"input": input_text, "context": docs}):
+            if token:
+                answer_parts.append(token)
+                yield "token", token
+        self._remember(vector, "".join(answer_parts), docs, generation)
+
+    def cache_stats(self) -> dict:
+        if self.answer_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.answer_cache.stats()}
+
+    def embedding_cache(self):
+        if self._embedding_cache is None and settings.EMBEDDING_CACHE_PATH:
+            self._embedding_cache = EmbeddingCache(settings.EMBEDDING_CACHE_PATH, settings.EMBEDDING_MODEL)
+        return self._embedding_cache
+
+    def _pipeline(self):
+        return EmbeddingPipeline(self.embeddings, cache=self.embedding_cache())
+
+    def _write(self, mutate, progress):
+        """
+        Apply `mutate` to a fresh copy of the on-disk index, persist it and swap it in.
+        In-flight queries keep using the current store until the swap.
+        """
+        # The file lock serializes writers in other workers as well
+        with self._ingest_lock, write_lock(self.index_path):
+            vector_store = (
+                LegalVectorStore.load(self.index_path, writable=True)
+                or LegalVectorStore(self.index_path)
+            )
+            try:
+                result = mutate(vector_store)
+                if vector_store.needs_retraining():
+                    # Rebuilt with lists sized for the current corpus; vectors
+                    # come back from the embedding cache
+                    progress(index_state="retraining")
+                    vector_store.compact(self._pipeline())
+                progress(index_state="committing")
+                vector_store.save()
+            except Exception:
+                vector_store.chunks.rollback()
+                raise
+            # Swap in a read-only (mmap) copy, like every other worker will load
+            self.load_index()
+            progress(index_state="committed")
+        return result
+
+    def upsert_document(self, source: str, splits: List, progress=None) -> dict:
+        progress = progress or _no_progress
+
+        def mutate(vector_store):
+            progress(index_state="embedding")
+            result = vector_store.upsert_document(source, splits, self._pipeline(), progress)
+            progress(document_id=result["document_id"], chunks_removed=result["chunks_removed"])
+            return result
+
+        return self._write(mutate, progress)
+
+    def delete_document(self, doc_id: str) -> int:
+        return self._write(lambda vector_store: vector_store.delete_document(doc_id), _no_progress)
+
+    def compact(self) -> int:
+        return self._write(lambda vector_store: vector_store.compact(self._pipeline()), _no_progress)
+
+    def list_documents(self) -> list:
+        vector_store = self.vector_store
+        if vector_store is None:
+            return []
+        return vector_store.documents()
+
+def _no_progress(**fields):
+    pass
+
+_engine = None
+_engine_lock = threading.Lock()
+
+def init_engine() -> RetrievalEngine:
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = RetrievalEngine()
+    return _engine
+
+def get_engine() -> RetrievalEngine:
+    # Scripts that never went through app startup get a lazily built engine
+    if _engine is None:
+        return init_engine()
+    return _engine
+
+def format_sources(docs) -> list:
+    return [
+        {
+            "content": doc.page_content[:200] + "...",
+            "metadata": doc.metadata
+        } for doc in docs
+    ]
+
+def load_and_split(file_path: str, progress=None, chunk_size: int = None, chunk_overlap: int = None):
+    progress = progress or _no_progress
+    chunk_size = chunk_size or settings.RAG_CHUNK_SIZE
+    chunk_overlap = settings.RAG_CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
 
-def ingest_document(file_path: str):
-    global vector_store
-    
     # 1. Load Document
     if file_path.endswith(".pdf"):
         loader = PyPDFLoader(file_path)
     else:
         loader = TextLoader(file_path)
-    
+
     docs = loader.load()
-    
+    progress(pages_loaded=len(docs))
+
     # 2. Split Text
-    text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
+    text_splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
     splits = text_splitter.split_documents(docs)
-    
+    progress(chunks_total=len(splits))
+    return splits
+
+def ingest_document(file_path: str, progress=None, source: str = None):
+    """
+    `progress`, when given, is called with keyword updates
+    (pages_loaded, chunks_total, chunks_embedded, index_state, ...).
+    `source` names the document; re-ingesting the same source replaces its chunks.
+    """
+    splits = load_and_split(file_path, progress)
+
     # 3. Embed and Store
-    embeddings = get_embeddings()
-    
-    if os.path.exists(FAISS_INDEX_PATH):
-        vector_store = FAISS.load_local(FAISS_INDEX_PATH, embeddings, allow_dangerous_deserialization=True)
-        vector_store.add_documents(splits)
-    else:
-        vector_store = FAISS.from_documents(splits, embeddings)
-    
-    vector_store.save_local(FAISS_INDEX_PATH)
-    return len(splits)
-
-def get_rag_chain():
-    global vector_store
-    embeddings = get_embeddings()
-    
-    if vector_store is None:
-        if os.path.exists(FAISS_INDEX_PATH):
-            vector_store = FAISS.load_local(FAISS_INDEX_PATH, embeddings, allow_dangerous_deserialization=True)
-        else:
-            raise ValueError("Vector store not found. Please ingest documents first.")
-            
-    llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key=settings.GOOGLE_API_KEY, temperature=0)
-    
-    prompt = ChatPromptTemplate.from_template("""
-    You are an expert Moroccan Legal Assistant named Jurid-AI.
-    Answer the user's question based ONLY on the following context. 
-    If the answer is not in the context, say "I do not have enough information in my legal database to answer this question."
-    Always cite the specific article numbers or source titles if available in the context.
-    
-    Context:
-    {context}
-    
-    Question: {input}
-    """)
-    
-    document_chain = create_stuff_documents_chain(llm, prompt)
-    retriever = vector_store.as_retriever()
-    retrieval_chain = create_retrieval_chain(retriever, document_chain)
-    
-    return retrieval_chain
+    return get_engine().upsert_document(source or os.path.basename(file_path), splits, progress)
 
 def query_rag(input_text: str):
-    chain = get_rag_chain()
-    response = chain.invoke({"input": input_text})
-    return response
+    return get_engine().query(input_text)
+
+async def aquery_rag(input_text: str):
+    return await get_engine().aquery(input_text)
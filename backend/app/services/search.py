@@ -0,0 +1,97 @@
+from typing import Optional
+from sqlalchemy import func, literal_column, or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import Consultation, Conversation, LegalSource, Message, UserRole
+from app.services.consultations import open_pool
+
+class SearchScope:
+    CONSULTATIONS = "consultations"
+    MESSAGES = "messages"
+    LEGAL_SOURCES = "legal_sources"
+
+SEARCH_SCOPES = [SearchScope.CONSULTATIONS, SearchScope.MESSAGES, SearchScope.LEGAL_SOURCES]
+
+# Text search configurations the search_vector columns are built with (migration 0006)
+TS_CONFIGS = ("french", "arabic")
+HEADLINE_OPTIONS = "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=30, MinWords=10, FragmentDelimiter= … "
+
+def _scope(scope: str):
+    """
+    (model, title column, text column, timestamp column) of a scope.
+    """
+    if scope == SearchScope.CONSULTATIONS:
+        return Consultation, Consultation.subject, Consultation.description, Consultation.created_at
+    if scope == SearchScope.MESSAGES:
+        return Message, Message.role, Message.content, Message.created_at
+    if scope == SearchScope.LEGAL_SOURCES:
+        return LegalSource, LegalSource.title, LegalSource.content, LegalSource.updated_at
+    raise ValueError(f"Unknown search scope: {scope}. Expected one of {SEARCH_SCOPES}")
+
+def _visible(query, scope: str, user, domain: Optional[str]):
+    # Same visibility as the list endpoints; legal sources are public
+    if scope == SearchScope.CONSULTATIONS:
+        if user.role == UserRole.EXPERT:
+            return query.where(or_(Consultation.expert_id == user.id, open_pool(domain)))
+        if user.role != UserRole.ADMIN:
+            return query.where(Consultation.user_id == user.id)
+    if scope == SearchScope.MESSAGES:
+        return query.join(Conversation, Conversation.id == Message.conversation_id).where(Conversation.user_id == user.id)
+    return query
+
+def _ts_query(text: str):
+    # Parse with every configuration so both french and arabic stems match
+    combined = None
+    for config in TS_CONFIGS:
+        parsed = func.websearch_to_tsquery(literal_column(f"'{config}'::regconfig"), text)
+        combined = parsed if combined is None else combined.op("||")(parsed)
+    return combined
+
+async def search(
+    db: AsyncSession, scope: str, text: str, user, limit: int, after: Optional[tuple] = None, domain: Optional[str] = None,
+) -> list:
+    """
+    Up to `limit + 1` rows of (id, title, headline, rank, timestamp), best match
+    first, strictly after the (rank, id) key `after`. `domain` is the expert's
+    domain, which bounds the unassigned consultations they can find.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return await _search_like(db, scope, text, user, limit, after, domain)
+
+    model, title_column, text_column, timestamp_column = _scope(scope)
+    vector = literal_column(f"{model.__tablename__}.search_vector")
+    ts_query = _ts_query(text)
+    rank = func.ts_rank_cd(vector, ts_query).label("rank")
+
+    # The GIN index finds the matches; ranking only touches matching rows
+    page = _visible(select(model.id, rank), scope, user, domain).where(vector.op("@@")(ts_query))
+    if after is not None:
+        page = page.where(tuple_(rank, model.id) < tuple_(after[0], after[1]))
+    page = page.order_by(rank.desc(), model.id.desc()).limit(limit + 1).subquery()
+
+    # Headlines are expensive: build them for the page rows only
+    headline = func.ts_headline(
+        literal_column("'french'::regconfig"), text_column, ts_query, HEADLINE_OPTIONS,
+    )
+    rows = (await db.execute(
+        select(model.id, title_column, headline, page.c.rank, timestamp_column)
+        .join(page, page.c.id == model.id)
+        .order_by(page.c.rank.desc(), model.id.desc())
+    )).all()
+    return [tuple(row) for row in rows]
+
+def _like_pattern(text: str) -> str:
+    # The query is matched literally: % and _ are not wildcards
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+async def _search_like(
+    db: AsyncSession, scope: str, text: str, user, limit: int, after: Optional[tuple], domain: Optional[str],
+) -> list:
+    # Development stand-in (SQLite): unranked substring match, ordered by id
+    model, title_column, text_column, timestamp_column = _scope(scope)
+    query = _visible(select(model.id, title_column, text_column, timestamp_column), scope, user, domain)
+    query = query.where(text_column.ilike(_like_pattern(text), escape="\\"))
+    if after is not None:
+        query = query.where(model.id < after[1])
+    rows = (await db.execute(query.order_by(model.id.desc()).limit(limit + 1))).all()
+    return [(id, title, content[:300], 0.0, timestamp) for id, title, content, timestamp in rows]
@@ -0,0 +1,55 @@
+import json
+import time
+from typing import Optional
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.models import Appointment, AppointmentStatus
+
+class TokenBucket:
+    """
+    `rate` events per second on average, bursts of up to `burst`. One per
+    socket, only touched from the event loop.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, cost: float = 1.0) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < cost:
+            return False
+        self.tokens -= cost
+        return True
+
+def room_name(appointment_id) -> str:
+    return f"appointment:{appointment_id}"
+
+def payload_size(data) -> int:
+    try:
+        return len(json.dumps(data, separators=(",", ":")))
+    except (TypeError, ValueError):
+        # Binary attachments and other non-JSON payloads are never relayed
+        return 1 << 30
+
+async def authorize_room(db: AsyncSession, appointment_id, user_id) -> Optional[str]:
+    """
+    Signaling room of a confirmed appointment, if `user_id` is its client or
+    its expert; None otherwise.
+    """
+    try:
+        appointment_id = UUID(str(appointment_id))
+    except ValueError:
+        return None
+    appointment = await db.get(Appointment, appointment_id)
+    if appointment is None or appointment.status != AppointmentStatus.CONFIRMED:
+        return None
+    if str(user_id) not in (str(appointment.user_id), str(appointment.expert_id)):
+        return None
+    return room_name(appointment.id)
@@ -0,0 +1,145 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.models.models import Appointment, Expert, ExpertAvailability
+from app.services.booking import ACTIVE_STATUSES, ensure_aware, rules_for_day
+
+def expand_rules(rules: list, start: date, days: int, slot_minutes: int, zone: ZoneInfo) -> list:
+    """
+    Cut the availability rules of each day in [start, start + days) into
+    slot_minutes-long (start, end) pairs, as aware UTC datetimes.
+    """
+    length = timedelta(minutes=slot_minutes)
+    slots = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        for rule in sorted(rules_for_day(rules, day), key=lambda rule: rule.start_time):
+            slot_start = datetime.combine(day, rule.start_time, tzinfo=zone)
+            rule_end = datetime.combine(day, rule.end_time, tzinfo=zone)
+            while slot_start + length <= rule_end:
+                slots.append((slot_start.astimezone(timezone.utc), (slot_start + length).astimezone(timezone.utc)))
+                slot_start += length
+    return slots
+
+def subtract_booked(slots: list, booked: list) -> list:
+    """
+    Drop every slot overlapping a booked interval. Both lists are sorted by start.
+    """
+    free, i = [], 0
+    for slot_start, slot_end in slots:
+        # Skip bookings that end before this slot starts; later slots start later still
+        while i < len(booked) and booked[i][1] <= slot_start:
+            i += 1
+        # booked[i] is the earliest-starting booking still running at slot_start;
+        # any later one starts even later
+        if i == len(booked) or booked[i][0] >= slot_end:
+            free.append((slot_start, slot_end))
+    return free
+
+class SlotCache:
+    """
+    Free slots per expert for a (start, days) window, LRU over experts with a TTL.
+    Slots that have started are filtered out at read time, not at write time.
+    """
+
+    def __init__(self, ttl_seconds: int = 60, max_experts: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_experts = max_experts
+        self._lock = threading.Lock()
+        self._experts = OrderedDict()  # expert_id -> {(start, days): (slots, stored_at)}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, expert_id, start: date, days: int):
+        with self._lock:
+            windows = self._experts.get(str(expert_id))
+            entry = windows.get((start, days)) if windows else None
+            if entry is not None and time.monotonic() - entry[1] <= self.ttl_seconds:
+                self._experts.move_to_end(str(expert_id))
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def put(self, expert_id, start: date, days: int, slots: list):
+        with self._lock:
+            windows = self._experts.setdefault(str(expert_id), {})
+            windows[(start, days)] = (slots, time.monotonic())
+            self._experts.move_to_end(str(expert_id))
+            while len(self._experts) > self.max_experts:
+                self._experts.popitem(last=False)
+
+    def invalidate(self, expert_id):
+        with self._lock:
+            self._experts.pop(str(expert_id), None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "experts": len(self._experts),
+            }
+
+_cache = SlotCache(settings.SLOT_CACHE_TTL_SECONDS, settings.SLOT_CACHE_MAX_EXPERTS)
+
+def invalidate_expert(expert_id):
+    # Call after committing a change to the expert's availability or appointments
+    _cache.invalidate(expert_id)
+
+def cache_stats() -> dict:
+    return _cache.stats()
+
+async def _compute_slots(db: AsyncSession, expert_id, start: date, days: int) -> list:
+    zone = ZoneInfo(settings.BOOKING_TIMEZONE)
+    rules = (await db.execute(
+        select(ExpertAvailability).where(ExpertAvailability.expert_id == expert_id)
+    )).scalars().all()
+    slots = expand_rules(rules, start, days, settings.BOOKING_SLOT_MINUTES, zone)
+    if not slots:
+        return []
+
+    # Every booking that can hold the expert's time, not only confirmed ones:
+    # a slot still pending for someone else would be rejected at booking time
+    booked = (await db.execute(
+        select(Appointment.start_time, Appointment.end_time)
+        .where(
+            Appointment.expert_id == expert_id,
+            Appointment.status.in_(ACTIVE_STATUSES),
+            Appointment.start_time < slots[-1][1],
+            Appointment.end_time > slots[0][0],
+        )
+        .order_by(Appointment.start_time)
+    )).all()
+    booked = [(ensure_aware(booked_start), ensure_aware(booked_end)) for booked_start, booked_end in booked]
+    return subtract_booked(slots, booked)
+
+async def expert_slots(db: AsyncSession, expert_id, start: date, days: int) -> list:
+    """
+    Bookable (start, end) UTC slots of one expert over [start, start + days).
+    """
+    slots = _cache.get(expert_id, start, days)
+    if slots is None:
+        slots = await _compute_slots(db, expert_id, start, days)
+        _cache.put(expert_id, start, days, slots)
+    now = datetime.now(timezone.utc)
+    return [(slot_start, slot_end) for slot_start, slot_end in slots if slot_start > now]
+
+async def domain_slots(db: AsyncSession, domain: str, start: date, days: int) -> list:
+    """
+    (expert_id, start, end) slots of every available expert in `domain`, sorted by start.
+    """
+    expert_ids = (await db.execute(
+        select(Expert.id).where(Expert.domain == domain, Expert.is_available == True)
+    )).scalars().all()
+    slots = []
+    for expert_id in expert_ids:
+        slots.extend((expert_id, slot_start, slot_end) for slot_start, slot_end in await expert_slots(db, expert_id, start, days))
+    return sorted(slots, key=lambda slot: slot[1])
@@ -0,0 +1,186 @@
+import asyncio
+import base64
+import json
+import logging
+import zlib
+from typing import Optional
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ManagerType:
+    # One process only: rooms and sids are local to the worker
+    MEMORY = "memory"
+    REDIS = "redis"
+    # LISTEN/NOTIFY on the application database, no extra service to run
+    POSTGRES = "postgres"
+    # Fan-out broker on a Unix socket, for several workers on one host (benchmarks, development)
+    LOCAL = "local"
+
+MANAGER_TYPES = [ManagerType.MEMORY, ManagerType.REDIS, ManagerType.POSTGRES, ManagerType.LOCAL]
+
+# NOTIFY payloads must stay under 8000 bytes; larger messages (SDP offers) are compressed
+PG_NOTIFY_MAX_BYTES = 7900
+COMPRESSED_PREFIX = "z:"
+# How long a listener waits before checking that its connection is still alive
+LISTEN_POLL_SECONDS = 5.0
+RECONNECT_SECONDS = 1.0
+
+def encode_message(data: dict) -> str:
+    return json.dumps(data, separators=(",", ":"))
+
+def compress_message(payload: str) -> str:
+    return COMPRESSED_PREFIX + base64.b64encode(zlib.compress(payload.encode("utf-8"))).decode("ascii")
+
+def decode_message(payload: str) -> str:
+    if payload.startswith(COMPRESSED_PREFIX):
+        return zlib.decompress(base64.b64decode(payload[len(COMPRESSED_PREFIX):])).decode("utf-8")
+    return payload
+
+def _asyncpg_dsn(url: str) -> str:
+    # asyncpg takes a plain libpq URL, without the SQLAlchemy driver suffix
+    for driver in ("+asyncpg", "+psycopg2"):
+        url = url.replace(driver, "", 1)
+    return url
+
+class PostgresNotifyManager(AsyncPubSubManager):
+    """
+    Socket.IO pub/sub over PostgreSQL LISTEN/NOTIFY. Each worker keeps one
+    connection that publishes and one that listens on the channel.
+    """
+    name = "postgres"
+
+    def __init__(self, url: str, channel: str = "socketio", write_only: bool = False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.dsn = _asyncpg_dsn(url)
+        self._publisher = None
+        self._publisher_lock = asyncio.Lock()
+
+    async def _publisher_connection(self):
+        import asyncpg
+
+        async with self._publisher_lock:
+            if self._publisher is None or self._publisher.is_closed():
+                self._publisher = await asyncpg.connect(self.dsn)
+            return self._publisher
+
+    async def _publish(self, data):
+        import asyncpg
+
+        payload = encode_message(data)
+        if len(payload.encode("utf-8")) > PG_NOTIFY_MAX_BYTES:
+            payload = compress_message(payload)
+            if len(payload) > PG_NOTIFY_MAX_BYTES:
+                logger.error("Dropped a %s message too large for NOTIFY (%d bytes)", data.get("method"), len(payload))
+                return
+        # One retry on a fresh connection, e.g. after a database restart
+        for attempt in range(2):
+            try:
+                connection = await self._publisher_connection()
+                await connection.execute("SELECT pg_notify($1, $2)", self.channel, payload)
+                return
+            except (OSError, asyncpg.InterfaceError, asyncpg.PostgresConnectionError) as e:
+                error = e
+                self._publisher = None
+        logger.error("Could not publish a Socket.IO message: %s", error)
+
+    async def _listen(self):
+        import asyncpg
+
+        queue = asyncio.Queue()
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                await connection.add_listener(self.channel, lambda _conn, _pid, _channel, payload: queue.put_nowait(payload))
+            except (OSError, asyncpg.PostgresError) as e:
+                logger.warning("Socket.IO listener cannot connect, retrying: %s", e)
+                await asyncio.sleep(RECONNECT_SECONDS)
+                continue
+            try:
+                while not connection.is_closed():
+                    try:
+                        payload = await asyncio.wait_for(queue.get(), LISTEN_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        continue
+                    yield decode_message(payload)
+            finally:
+                if not connection.is_closed():
+                    await connection.close()
+
+class LocalSocketManager(AsyncPubSubManager):
+    """
+    Socket.IO pub/sub through `serve_local_broker` on a Unix socket: the
+    multi-worker behaviour of the Redis manager without running Redis.
+    """
+    name = "local"
+
+    def __init__(self, path: str, channel: str = "socketio", write_only: bool = False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.path = path
+        self._writer = None
+        self._writer_lock = asyncio.Lock()
+
+    async def _publish(self, data):
+        line = (encode_message(data) + "\n").encode("utf-8")
+        async with self._writer_lock:
+            if self._writer is None or self._writer.is_closing():
+                _, self._writer = await asyncio.open_unix_connection(self.path)
+            self._writer.write(line)
+            await self._writer.drain()
+
+    async def _listen(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path, limit=1 << 24)
+            except OSError as e:
+                logger.warning("Socket.IO broker unreachable at %s, retrying: %s", self.path, e)
+                await asyncio.sleep(RECONNECT_SECONDS)
+                continue
+            try:
+                while line := await reader.readline():
+                    yield line.decode("utf-8")
+            finally:
+                writer.close()
+
+async def serve_local_broker(path: str):
+    """
+    Relay every line a client writes to all connected clients. Publishers and
+    listeners of `LocalSocketManager` connect here.
+    """
+    clients = set()
+
+    async def relay(reader, writer):
+        clients.add(writer)
+        try:
+            while line := await reader.readline():
+                for client in list(clients):
+                    client.write(line)
+        except ConnectionError:
+            pass
+        finally:
+            clients.discard(writer)
+            writer.close()
+
+    return await asyncio.start_unix_server(relay, path=path, limit=1 << 24)
+
+def client_manager(manager_type: str = None, url: Optional[str] = None):
+    """
+    The Socket.IO client manager for SOCKETIO_MANAGER, or None for the
+    default in-memory manager.
+    """
+    manager_type = manager_type or settings.SOCKETIO_MANAGER
+    url = url or settings.SOCKETIO_MESSAGE_QUEUE
+    channel = settings.SOCKETIO_CHANNEL
+    if manager_type == ManagerType.MEMORY:
+        return None
+    if manager_type == ManagerType.REDIS:
+        return socketio.AsyncRedisManager(url or "redis://localhost:6379/0", channel=channel)
+    if manager_type == ManagerType.POSTGRES:
+        return PostgresNotifyManager(url or settings.DATABASE_URL, channel=channel)
+    if manager_type == ManagerType.LOCAL:
+        if not url:
+            raise ValueError("SOCKETIO_MESSAGE_QUEUE must be the broker socket path for the local manager")
+        return LocalSocketManager(url, channel=channel)
+    raise ValueError(f"Unknown SOCKETIO_MANAGER: {manager_type}. Expected one of {MANAGER_TYPES}")
@@ -0,0 +1,103 @@
+import threading
+import time
+from collections import OrderedDict
+from app.core.config import settings
+
+class UserPrincipal:
+    """
+    The fields of a User that request handlers read. Detached from any session,
+    so it can be shared between requests.
+    """
+
+    __slots__ = ("id", "email", "full_name", "role")
+
+    def __init__(self, id, email: str, full_name: str, role: str):
+        self.id = id
+        self.email = email
+        self.full_name = full_name
+        self.role = role
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.email, user.full_name, user.role)
+
+class UserCache:
+    """
+    LRU + TTL cache of principals keyed by (user id, token). An entry never
+    outlives its token. Invalidation is local to the worker; other workers
+    pick up the change within `ttl_seconds`.
+    """
+
+    def __init__(self, ttl_seconds: int = 60, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (user_id, token) -> (principal, expires_at)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str, token: str):
+        key = (str(user_id), token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, user_id: str, token: str, principal: UserPrincipal, token_expires_at: float = None):
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        with self._lock:
+            self._entries[(str(user_id), token)] = (principal, expires_at)
+            self._entries.move_to_end((str(user_id), token))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": True,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+_cache = UserCache(settings.USER_CACHE_TTL_SECONDS, settings.USER_CACHE_MAX_ENTRIES) if settings.USER_CACHE_ENABLED else None
+
+def get(user_id, token: str):
+    if _cache is None:
+        return None
+    return _cache.get(user_id, token)
+
+def put(user_id, token: str, principal: UserPrincipal, token_expires_at: float = None):
+    if _cache is not None:
+        _cache.put(user_id, token, principal, token_expires_at)
+
+def invalidate_user(user_id):
+    # Call whenever a user's role or profile changes
+    if _cache is not None:
+        _cache.invalidate_user(user_id)
+
+def stats() -> dict:
+    if _cache is None:
+        return {"enabled": False}
+    return _cache.stats()
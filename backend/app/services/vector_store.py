@@ -0,0 +1,324 @@
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+from collections import Counter
+from contextlib import contextmanager
+from typing import List
+import faiss
+import numpy as np
+from app.core.config import settings
+from app.services import index_factory
+from app.services.bm25_index import BM25Index, reciprocal_rank_fusion
+from app.services.chunk_store import ChunkStore, ChunkState
+
+INDEX_FILE = "index.faiss"
+CHUNKS_FILE = "chunks.sqlite3"
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = "write.lock"
+# Written by langchain's FAISS.save_local before the chunk store existed
+LEGACY_DOCSTORE_FILE = "index.pkl"
+
+# Over-fetch used to fill k results when tombstoned vectors come back from the index
+MAX_TOMBSTONE_OVERFETCH = 100
+
+def document_id(source: str) -> str:
+    # A document keeps its id across amendments so new versions replace old chunks
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+def content_hash(texts: List[str]) -> str:
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def chunk_ids(doc_id: str, texts: List[str]) -> List[str]:
+    # Identical chunks inside one document get distinct ids through their occurrence number
+    seen = Counter()
+    ids = []
+    for text in texts:
+        occurrence = seen[text]
+        seen[text] += 1
+        ids.append(hashlib.sha256(f"{doc_id}\0{occurrence}\0{text}".encode("utf-8")).hexdigest())
+    return ids
+
+@contextmanager
+def write_lock(path: str):
+    """
+    Exclusive lock on the index directory, across threads and worker processes.
+    Hold it from loading the writable copy until it is saved, or a concurrent
+    writer's vectors are lost when the last one replaces the files.
+    """
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, LOCK_FILE), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def _read_index(path: str, writable: bool):
+    if writable:
+        return faiss.read_index(path)
+    # Let the OS share index pages between workers where the index type supports it
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    try:
+        return faiss.read_index(path, flags)
+    except RuntimeError:
+        return faiss.read_index(path)
+
+class LegalVectorStore:
+    """
+    FAISS index of chunk vectors keyed by int64 slot ids, plus a ChunkStore that
+    holds the text, metadata and document bookkeeping for every slot.
+
+    Chunks are added and removed per document. When the index cannot remove
+    vectors safely (HNSW, IVF built under an id map), removed chunks are tombstoned and filtered out of search
+    results until `compact()` rebuilds the index.
+    """
+
+    def __init__(self, path: str, index=None, chunks: ChunkStore = None, manifest: dict = None):
+        self.path = path
+        # Created on the first batch of vectors when there is no index on disk yet
+        self.index = index
+        if chunks is None:
+            os.makedirs(path, exist_ok=True)
+            chunks = ChunkStore(os.path.join(path, CHUNKS_FILE))
+        self.chunks = chunks
+        self.lexical = BM25Index(chunks)
+        self.manifest = manifest or {"version": 0, "tombstones": 0}
+
+    @classmethod
+    def load(cls, path: str, writable: bool = False):
+        index_path = os.path.join(path, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return None
+        if os.path.exists(os.path.join(path, LEGACY_DOCSTORE_FILE)):
+            if writable:
+                # Writers already hold the index lock that the migration takes
+                raise RuntimeError(f"Found a legacy pickle docstore in {path}. Run migrate_docstore.py first.")
+            # Without the chunk store the index has no text to return and cannot take new chunks
+            from app.services import legacy_docstore
+            legacy_docstore.migrate(path)
+        index = index_factory.configure_search(_read_index(index_path, writable))
+        manifest = None
+        manifest_path = os.path.join(path, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+        return cls(path, index, ChunkStore(os.path.join(path, CHUNKS_FILE)), manifest)
+
+    @staticmethod
+    def manifest_mtime(path: str):
+        try:
+            return os.stat(os.path.join(path, MANIFEST_FILE)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    @property
+    def tombstones(self) -> int:
+        return self.manifest["tombstones"]
+
+    def needs_retraining(self) -> bool:
+        """
+        Whether an IVF index has outgrown the corpus it was trained on. Its list
+        count was capped by that corpus, e.g. about 10 lists for a first upload
+        of 400 chunks, so searches scan ever longer lists until it is rebuilt.
+        """
+        if self.index is None:
+            return False
+        nlist = index_factory.ivf_lists(self.index)
+        if nlist is None:
+            return False
+        # Indexes trained before the manifest recorded it: estimate from the list count
+        trained_on = self.manifest.get("trained_on") or nlist * 39
+        return self.index.ntotal > trained_on * settings.FAISS_RETRAIN_GROWTH
+
+    def documents(self) -> list:
+        return self.chunks.documents()
+
+    def save(self):
+        if self.index is None:
+            self.chunks.commit()
+            return
+        index_path = os.path.join(self.path, INDEX_FILE)
+        manifest_path = os.path.join(self.path, MANIFEST_FILE)
+
+        # Write then rename: workers that mmap the old file keep a consistent view
+        faiss.write_index(self.index, index_path + ".tmp")
+        self.chunks.commit()
+        os.replace(index_path + ".tmp", index_path)
+
+        self.manifest["version"] += 1
+        with open(manifest_path + ".tmp", "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(manifest_path + ".tmp", manifest_path)
+
+    def search_slots(self, vector, k: int) -> List[int]:
+        if self.index is None or self.index.ntotal == 0:
+            return []
+        fetch_k = k + min(self.tombstones, MAX_TOMBSTONE_OVERFETCH)
+        _, slots = self.index.search(np.asarray([vector], dtype=np.float32), fetch_k)
+        return [int(slot) for slot in slots[0] if slot != -1]
+
+    def search_by_vector(self, vector, k: int) -> list:
+        return self.chunks.fetch(self.search_slots(vector, k))[:k]
+
+    def search(self, vector, query: str, k: int, hybrid: bool = None) -> list:
+        """
+        Dense search fused with BM25 by reciprocal rank fusion. Exact article
+        numbers and legal terms that MiniLM blurs are recovered by the lexical side.
+        """
+        hybrid = settings.HYBRID_SEARCH_ENABLED if hybrid is None else hybrid
+        if not hybrid:
+            return self.search_by_vector(vector, k)
+
+        candidates = max(k, settings.HYBRID_CANDIDATES)
+        fused = reciprocal_rank_fusion(
+            [
+                (self.search_slots(vector, candidates), settings.HYBRID_DENSE_WEIGHT),
+                (self.lexical.search(query, candidates), settings.HYBRID_LEXICAL_WEIGHT),
+            ],
+            rrf_k=settings.HYBRID_RRF_K,
+        )
+        # Over-fetch a little: some fused slots may be tombstoned
+        return self.chunks.fetch(fused[:k + min(self.tombstones, MAX_TOMBSTONE_OVERFETCH)])[:k]
+
+    async def asearch(self, vector, query: str, k: int) -> list:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.search, vector, query, k)
+
+    def _add(self, ids: List[str], texts: List[str], metadatas: List[dict], pipeline, progress):
+        blocks = pipeline.run(texts)
+        if self.index is None or not self.index.is_trained:
+            # IVF indexes must be trained on a sample before the first vector goes in
+            blocks = list(blocks)
+            if not blocks:
+                return
+            vectors = np.array([vector for _, _, block in blocks for vector in block], dtype=np.float32)
+            if self.index is None:
+                self.index = index_factory.build_index(vectors.shape[1], num_vectors=len(vectors))
+            index_factory.train(self.index, vectors)
+            self.manifest["trained_on"] = len(vectors)
+
+        # Slots are never reused, even after compaction purges rows: a worker
+        # still on an older index must not resolve a slot to unrelated text
+        next_slot = max(self.manifest.get("next_slot", 0), self.chunks.next_slot())
+        for start, end, vectors in blocks:
+            slots = np.arange(next_slot, next_slot + end - start, dtype=np.int64)
+            next_slot += end - start
+            self.manifest["next_slot"] = next_slot
+            self.index.add_with_ids(np.asarray(vectors, dtype=np.float32), slots)
+            self.chunks.insert(slots, ids[start:end], texts[start:end], metadatas[start:end])
+            self.lexical.add(slots, texts[start:end])
+            progress(
+                chunks_embedded=end,
+                chunks_per_second=round(pipeline.chunks_per_second, 2),
+                embedding_cache_hits=pipeline.cache_hits,
+            )
+
+    def _remove(self, slots: List[int]):
+        if not slots or self.index is None:
+            return
+        self.lexical.remove(slots)
+        if index_factory.supports_removal(self.index):
+            try:
+                self.index.remove_ids(np.asarray(slots, dtype=np.int64))
+                self.chunks.set_state(slots, ChunkState.REMOVED)
+                return
+            except RuntimeError:
+                pass
+        # e.g. HNSW: filtered out of results until compact() rebuilds the index
+        self.chunks.set_state(slots, ChunkState.TOMBSTONED)
+        self.manifest["tombstones"] += len(slots)
+
+    def upsert_document(self, source: str, splits: List, pipeline, progress) -> dict:
+        """
+        Insert or replace every chunk of `source`. Chunks whose text did not change
+        keep their vectors; only new chunks are embedded.
+        """
+        doc_id = document_id(source)
+        texts = [split.page_content for split in splits]
+        digest = content_hash(texts)
+
+        current = self.chunks.document_hash(doc_id)
+        if current == digest:
+            return {"document_id": doc_id, "status": "unchanged", "chunks_added": 0, "chunks_removed": 0}
+        # Another document's content is only a duplicate for a new upload; an
+        # existing document amended to that content is replaced as usual
+        duplicate = self.chunks.document_with_hash(digest) if current is None else None
+        if duplicate is not None:
+            return {"document_id": duplicate, "status": "duplicate", "chunks_added": 0, "chunks_removed": 0}
+
+        ids = chunk_ids(doc_id, texts)
+        old = self.chunks.chunks_of(doc_id, ChunkState.LIVE)
+        tombstoned = self.chunks.chunks_of(doc_id, ChunkState.TOMBSTONED)
+        new_ids = set(ids)
+
+        to_remove = [slot for chunk_id, slot in old.items() if chunk_id not in new_ids]
+        self._remove(to_remove)
+
+        add_ids, add_texts, add_metadatas, revived = [], [], [], []
+        for chunk_id, split in zip(ids, splits):
+            if chunk_id in old:
+                continue
+            if chunk_id in tombstoned:
+                # Still in the index from an earlier version: just bring it back
+                revived.append(tombstoned[chunk_id])
+                continue
+            add_ids.append(chunk_id)
+            add_texts.append(split.page_content)
+            add_metadatas.append({**split.metadata, "source": source, "document_id": doc_id, "chunk_id": chunk_id})
+        if revived:
+            self.chunks.set_state(revived, ChunkState.LIVE)
+            rows = self.chunks.contents(revived)
+            self.lexical.add([slot for slot, _ in rows], [text for _, text in rows])
+            self.manifest["tombstones"] -= len(revived)
+        self._add(add_ids, add_texts, add_metadatas, pipeline, progress)
+
+        self.chunks.put_document(doc_id, source, digest)
+        return {
+            "document_id": doc_id,
+            "status": "updated" if old else "created",
+            "chunks_added": len(add_ids),
+            "chunks_removed": len(to_remove),
+        }
+
+    def delete_document(self, doc_id: str) -> int:
+        if not self.chunks.delete_document(doc_id):
+            return 0
+        slots = list(self.chunks.chunks_of(doc_id, ChunkState.LIVE).values())
+        self._remove(slots)
+        return len(slots)
+
+    def compact(self, pipeline) -> int:
+        """
+        Rebuild the index from live chunks only, dropping every tombstone and the
+        rows of removed chunks. The new index uses the configured FAISS_INDEX_TYPE,
+        so this is also the migration path between index types. Vectors come back
+        from the embedding cache, so this does not re-encode.
+        """
+        if self.index is None:
+            return 0
+        rows = self.chunks.live_chunks()
+        slots = np.array([slot for slot, _ in rows], dtype=np.int64)
+        texts = [text for _, text in rows]
+
+        vectors = [vector for _, _, block in pipeline.run(texts) for vector in block]
+        if vectors:
+            vectors = np.asarray(vectors, dtype=np.float32)
+            self.index = index_factory.build_index(vectors.shape[1], num_vectors=len(vectors))
+            index_factory.train(self.index, vectors)
+            self.manifest["trained_on"] = len(vectors)
+            self.index.add_with_ids(vectors, slots)
+        else:
+            # Nothing left to train on: keep an empty flat index so the files on disk are replaced
+            self.index = index_factory.build_index(self.index.d, index_type=index_factory.IndexType.FLAT)
+
+        self.chunks.purge_dead()
+        # Also builds the BM25 postings for corpora ingested before hybrid search existed
+        self.lexical.rebuild(rows)
+        self.manifest["tombstones"] = 0
+        return len(rows)
@@ -1,4 +1,7 @@
+import time
 import socketio
+from app.core.config import settings
+from app.services import notifications, signaling, socket_manager
 
 # Define allowed origins matching FastAPI config
 origins = [
@@ -8,37 +11,199 @@ origins = [
     "http://127.0.0.1:3000"
 ]
 
+# With several workers, emits to a room or sid go through the message queue, so
+# peers of one room can be connected to different workers
 sio = socketio.AsyncServer(
     async_mode='asgi',
-    cors_allowed_origins=origins
+    cors_allowed_origins=origins,
+    client_manager=socket_manager.client_manager(),
+    transports=settings.SOCKETIO_TRANSPORTS,
+    # Larger frames are refused by the transport before any handler parses them
+    max_http_buffer_size=settings.SOCKETIO_MAX_MESSAGE_BYTES,
 )
 
+# Per-connection rate limits and rejected event counts; dropped on disconnect
+_buckets = {}
+_violations = {}
+
+# Joining a room reads the database: it costs more than relaying a message
+JOIN_ROOM_COST = 5
+
 @sio.event
-async def connect(sid, environ):
+async def connect(sid, environ, auth=None):
+    # Same JWT as the REST API, sent by the client as `auth: { token }`
+    token = auth.get('token') if isinstance(auth, dict) else None
+    identity = await _authenticate(token) if token else None
+    if identity is None:
+        raise socketio.exceptions.ConnectionRefusedError('Could not validate credentials')
+    user_id, expires_at = identity
+    await sio.save_session(sid, {'user_id': user_id, 'expires_at': expires_at, 'room': None})
+    _buckets[sid] = signaling.TokenBucket(settings.SIGNALING_RATE_PER_SECOND, settings.SIGNALING_BURST)
+    # Live user events; subscribe_events replays what was missed
+    await sio.enter_room(sid, notifications.user_room(user_id))
     print(f"Client connected: {sid}")
 
 @sio.event
 async def disconnect(sid):
+    _buckets.pop(sid, None)
+    _violations.pop(sid, None)
+    session = await sio.get_session(sid)
+    if session.get('room'):
+        await sio.emit('user_left', {'sid': sid}, room=session['room'], skip_sid=sid)
     print(f"Client disconnected: {sid}")
 
+async def _reject(sid, detail: str):
+    _violations[sid] = _violations.get(sid, 0) + 1
+    if _violations[sid] > settings.SIGNALING_MAX_VIOLATIONS:
+        await sio.disconnect(sid)
+        return
+    await sio.emit('signaling_error', {'detail': detail}, room=sid)
+
+async def _guard(sid, data=None, max_bytes: int = None, cost: float = 1):
+    """
+    Session of `sid` if this event may go through: within the connection's
+    rate limit, under the payload cap and with an unexpired token. None when
+    the event must be dropped.
+    """
+    bucket = _buckets.get(sid)
+    if bucket is None or not bucket.take(cost):
+        await _reject(sid, 'Rate limit exceeded')
+        return None
+    if data is not None and signaling.payload_size(data) > (max_bytes or settings.SIGNALING_MAX_PAYLOAD_BYTES):
+        await _reject(sid, 'Payload too large')
+        return None
+    session = await sio.get_session(sid)
+    if session['expires_at'] is not None and session['expires_at'] < time.time():
+        await sio.emit('signaling_error', {'detail': 'Token expired'}, room=sid)
+        await sio.disconnect(sid)
+        return None
+    return session
+
 @sio.event
 async def join_room(sid, room_id):
-    print(f"Client {sid} joined room {room_id}")
-    sio.enter_room(sid, room_id)
+    # room_id is the id of a confirmed appointment the user takes part in
+    from app.db.database import AsyncSessionLocal
+
+    session = await _guard(sid, cost=JOIN_ROOM_COST)
+    if session is None:
+        return
+    async with AsyncSessionLocal() as db:
+        room = await signaling.authorize_room(db, room_id, session['user_id'])
+    if room is None:
+        await _reject(sid, 'Not a participant of a confirmed appointment')
+        return
+
+    if session['room'] and session['room'] != room:
+        await sio.leave_room(sid, session['room'])
+    session['room'] = room
+    await sio.save_session(sid, session)
+    await sio.enter_room(sid, room)
+    print(f"Client {sid} joined room {room}")
     # Notify others in the room
-    await sio.emit('user_joined', {'sid': sid}, room=room_id, skip_sid=sid)
+    await sio.emit('user_joined', {'sid': sid}, room=room, skip_sid=sid)
+
+@sio.event
+async def subscribe_events(sid, data):
+    # data: { after: cursor }. Replays newer events as user_event, then
+    # events_replayed { last_id, more, cursor }; ask again from last_id while
+    # `more`, and resume from `cursor` after a reconnect. Live and re-sent events
+    # arrive during the replay too: clients skip events they already have
+    from app.db.database import AsyncSessionLocal
+
+    session = await _guard(sid, data, cost=JOIN_ROOM_COST)
+    if session is None:
+        return
+    after = data.get('after') if isinstance(data, dict) else None
+    if not isinstance(after, int) or after < 0:
+        await _reject(sid, 'Invalid event cursor')
+        return
+
+    limit = settings.USER_EVENTS_REPLAY_LIMIT
+    async with AsyncSessionLocal() as db:
+        events = await notifications.events_after(db, session['user_id'], after, limit)
+        last_id = events[-1].id if events else after
+        cursor = max(after, await notifications.settled_event_id(db, session['user_id'], up_to=last_id))
+    for event in events:
+        await sio.emit('user_event', notifications.serialize(event), room=sid)
+    await sio.emit('events_replayed', {'last_id': last_id, 'more': len(events) == limit, 'cursor': cursor}, room=sid)
+
+async def _relay(sid, event: str, data, field: str, sender_field: str, max_bytes: int = None):
+    session = await _guard(sid, data, max_bytes)
+    if session is None or not session['room'] or not isinstance(data, dict) or field not in data:
+        return
+    # Only to the other participant of the sender's room, whatever `target` the client names
+    await sio.emit(event, {field: data[field], sender_field: sid}, room=session['room'], skip_sid=sid)
 
 @sio.event
 async def offer(sid, data):
     # data: { target: target_sid, sdp: ... }
-    await sio.emit('offer', {'sdp': data['sdp'], 'caller': sid}, room=data['target'])
+    await _relay(sid, 'offer', data, 'sdp', 'caller')
 
 @sio.event
 async def answer(sid, data):
     # data: { target: target_sid, sdp: ... }
-    await sio.emit('answer', {'sdp': data['sdp'], 'responder': sid}, room=data['target'])
+    await _relay(sid, 'answer', data, 'sdp', 'responder')
 
 @sio.event
 async def ice_candidate(sid, data):
     # data: { target: target_sid, candidate: ... }
-    await sio.emit('ice_candidate', {'candidate': data['candidate'], 'sender': sid}, room=data['target'])
+    await _relay(sid, 'ice_candidate', data, 'candidate', 'sender', settings.SIGNALING_MAX_CANDIDATE_BYTES)
+
+async def _authenticate(token):
+    # Imported lazily: the API modules import this one for the shared server
+    from uuid import UUID
+    from jose import jwt, JWTError
+    from app.db.database import AsyncSessionLocal
+    from app.models.models import User
+    from app.services.security import ALGORITHM
+
+    from app.services import user_cache
+    from app.services.user_cache import UserPrincipal
+
+    # (user id, token expiry) or None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    principal = user_cache.get(payload.get("sub"), token)
+    if principal is not None:
+        return principal.id, payload.get("exp")
+    try:
+        user_id = UUID(str(payload.get("sub")))
+    except ValueError:
+        return None
+    async with AsyncSessionLocal() as db:
+        user = await db.get(User, user_id)
+        if user is None:
+            return None
+        user_cache.put(payload.get("sub"), token, UserPrincipal.from_user(user), payload.get("exp"))
+        return user.id, payload.get("exp")
+
+@sio.event
+async def chat_query(sid, data):
+    # data: { message: str, conversation_id?: str }, as the user authenticated on connect
+    # Streams chat_sources, chat_token... then chat_done back to the caller only
+    from uuid import UUID
+    from fastapi import HTTPException
+    from app.api.chat import start_user_turn, stream_chat_events
+    from app.db.database import AsyncSessionLocal
+
+    session = await _guard(sid, data, settings.SOCKETIO_MAX_MESSAGE_BYTES)
+    if session is None or not isinstance(data, dict) or not data.get('message'):
+        return
+    user_id = session['user_id']
+
+    try:
+        conversation_id = UUID(data['conversation_id']) if data.get('conversation_id') else None
+    except ValueError:
+        await sio.emit('chat_error', {'detail': 'Invalid conversation id'}, room=sid)
+        return
+
+    try:
+        async with AsyncSessionLocal() as db:
+            conversation_id = (await start_user_turn(db, user_id, data['message'], conversation_id)).id
+    except HTTPException as e:
+        await sio.emit('chat_error', {'detail': e.detail}, room=sid)
+        return
+    async for event, payload in stream_chat_events(conversation_id, data['message']):
+        await sio.emit(f'chat_{event}', payload, room=sid)
@@ -0,0 +1,111 @@
+"""
+Recall vs latency of the FAISS index types offered by app.services.index_factory.
+
+    python -m benchmarks.ann_benchmark --vectors 1000000 --queries 500
+    python -m benchmarks.ann_benchmark --from-index faiss_index --output ann.json
+
+Ground truth comes from an exact Flat search over the same vectors.
+"""
+import argparse
+import json
+import time
+import faiss
+import numpy as np
+from app.services import index_factory
+from app.services.index_factory import IndexType
+
+CONFIGS = [
+    (IndexType.FLAT, {}),
+    (IndexType.IVF_FLAT, {"nprobe": 4}),
+    (IndexType.IVF_FLAT, {"nprobe": 16}),
+    (IndexType.IVF_FLAT, {"nprobe": 64}),
+    (IndexType.HNSW, {"ef_search": 32}),
+    (IndexType.HNSW, {"ef_search": 64}),
+    (IndexType.HNSW, {"ef_search": 128}),
+    (IndexType.IVF_PQ, {"nprobe": 16}),
+    (IndexType.IVF_PQ, {"nprobe": 64}),
+]
+
+def synthetic_vectors(count: int, dimension: int, clusters: int = 256) -> np.ndarray:
+    # Clustered data behaves much more like sentence embeddings than uniform noise
+    rng = np.random.default_rng(42)
+    centers = rng.normal(size=(clusters, dimension)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    return centers[labels] + 0.3 * rng.normal(size=(count, dimension)).astype(np.float32)
+
+def index_vectors(path: str) -> np.ndarray:
+    index = index_factory.base_index(faiss.read_index(f"{path}/index.faiss"))
+    return index.reconstruct_n(0, index.ntotal)
+
+def percentile_ms(samples, q) -> float:
+    return float(np.percentile(samples, q) * 1000)
+
+def run_config(index_type, params, vectors, queries, truth, k):
+    index = index_factory.build_index(vectors.shape[1], index_type, num_vectors=len(vectors), params=params)
+
+    started = time.perf_counter()
+    index_factory.train(index, vectors)
+    index.add_with_ids(vectors, np.arange(len(vectors), dtype=np.int64))
+    build_seconds = time.perf_counter() - started
+
+    latencies = []
+    found = np.empty((len(queries), k), dtype=np.int64)
+    for i, query in enumerate(queries):
+        started = time.perf_counter()
+        _, ids = index.search(query.reshape(1, -1), k)
+        latencies.append(time.perf_counter() - started)
+        found[i] = ids[0]
+
+    recall = np.mean([len(set(found[i]) & set(truth[i])) / k for i in range(len(queries))])
+    return {
+        "index_type": index_type,
+        "params": params,
+        "build_seconds": round(build_seconds, 3),
+        "index_bytes": int(faiss.serialize_index(index).nbytes),
+        f"recall@{k}": round(float(recall), 4),
+        "p50_ms": round(percentile_ms(latencies, 50), 3),
+        "p95_ms": round(percentile_ms(latencies, 95), 3),
+        "p99_ms": round(percentile_ms(latencies, 99), 3),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=100000, help="Synthetic corpus size")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--from-index", help="Benchmark on the vectors of an existing Flat or HNSW FAISS index")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    if args.from_index:
+        vectors = index_vectors(args.from_index)
+    else:
+        vectors = synthetic_vectors(args.vectors, args.dimension)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+    rng = np.random.default_rng(7)
+    picks = rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)
+    queries = vectors[picks] + 0.05 * rng.normal(size=(len(picks), vectors.shape[1])).astype(np.float32)
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    print(f"{len(vectors)} vectors, dim {vectors.shape[1]}, {len(queries)} queries, k={args.k}")
+    results = []
+    for index_type, params in CONFIGS:
+        result = run_config(index_type, params, vectors, queries, truth, args.k)
+        results.append(result)
+        print(
+            f"{index_type:8} {json.dumps(params):22} recall@{args.k}={result[f'recall@{args.k}']:.3f} "
+            f"p50={result['p50_ms']:.3f}ms p99={result['p99_ms']:.3f}ms "
+            f"build={result['build_seconds']:.1f}s size={result['index_bytes'] / 1e6:.1f}MB"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"vectors": len(vectors), "k": args.k, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Concurrent /chat/query load test against the in-process app, with a fake LLM
+of fixed latency and a throwaway SQLite database.
+
+    pip install httpx aiosqlite
+    python -m benchmarks.chat_load_test --requests 200 --latency 2
+
+The async endpoint is compared with the previous synchronous path (RetrievalEngine.query
+on the anyio thread pool, 40 threads by default). With a 2s LLM and 200 requests,
+the thread-bound path needs about ceil(200 / 40) * 2s; the async path about 2s.
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+# Must come before the app imports
+from benchmarks import harness
+import anyio
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from app.api import deps
+from app.core.config import settings
+from app.main import fastapi_app
+from app.services import rag_service
+from benchmarks.fake_llm import SlowFakeChatModel
+
+def corpus(articles: int = 200) -> list:
+    return [
+        Document(page_content=f"Article {n} du Code du travail : dispositions relatives au contrat de travail n°{n}.")
+        for n in range(1, articles + 1)
+    ]
+
+def summarize(latencies: list, wall: float, llm_latency: float) -> dict:
+    return {
+        "requests": len(latencies),
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(len(latencies) / wall, 2),
+        # How many LLM calls were effectively waiting at the same time
+        "effective_concurrency": round(len(latencies) * llm_latency / wall, 1),
+        **harness.percentiles(latencies),
+    }
+
+async def run_async_endpoint(count: int) -> tuple:
+    async with harness.client() as client:
+        async def one(i):
+            started = time.perf_counter()
+            response = await client.post(f"{settings.API_V1_STR}/chat/query", json={"message": f"Question {i} sur le préavis"})
+            response.raise_for_status()
+            return time.perf_counter() - started
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(one(i) for i in range(count)))
+        return list(latencies), time.perf_counter() - started
+
+async def run_threadpool_baseline(count: int, engine) -> tuple:
+    # What the former `def chat_query` did: one pool thread per request for the whole LLM call
+    async def one(i):
+        started = time.perf_counter()
+        await anyio.to_thread.run_sync(engine.query, f"Question {i} sur le préavis")
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(count)))
+    return list(latencies), time.perf_counter() - started
+
+async def run(args) -> dict:
+    user = await harness.create_user()
+    fastapi_app.dependency_overrides[deps.get_current_user] = lambda: user
+
+    engine = rag_service.RetrievalEngine(
+        index_path=os.path.join(harness.WORKDIR, "faiss_index"),
+        embeddings=DeterministicFakeEmbedding(size=384),
+        llm=SlowFakeChatModel(latency=args.latency),
+    )
+    engine.upsert_document("Code du travail", corpus())
+    rag_service._engine = engine
+
+    thread_limit = anyio.to_thread.current_default_thread_limiter().total_tokens
+    print(f"{args.requests} concurrent requests, LLM latency {args.latency}s, thread pool size {thread_limit}")
+
+    results = {"thread_limit": thread_limit, "llm_latency": args.latency}
+    latencies, wall = await run_async_endpoint(args.requests)
+    results["async_endpoint"] = summarize(latencies, wall, args.latency)
+    if not args.skip_baseline:
+        latencies, wall = await run_threadpool_baseline(args.requests, engine)
+        results["threadpool_baseline"] = summarize(latencies, wall, args.latency)
+
+    for name in ("async_endpoint", "threadpool_baseline"):
+        if name in results:
+            r = results[name]
+            print(
+                f"{name:20} wall={r['wall_seconds']:.2f}s rps={r['requests_per_second']:.1f} "
+                f"concurrency={r['effective_concurrency']:.0f} p50={r['p50_ms']:.0f}ms p99={r['p99_ms']:.0f}ms"
+            )
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=2.0, help="Seconds the fake LLM takes per answer")
+    parser.add_argument("--skip-baseline", action="store_true", help="Only run the async endpoint")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+The fixture legal corpus (fixtures/legal_corpus.json) shared by the RAG
+benchmarks, written out as plain-text documents so ingestion goes through
+the same loader and splitter as an uploaded file, and the questions labelled
+against it (fixtures/questions.json).
+"""
+import json
+import os
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+CORPUS_PATH = os.path.join(FIXTURES_DIR, "legal_corpus.json")
+QUESTIONS_PATH = os.path.join(FIXTURES_DIR, "questions.json")
+
+def load_corpus() -> list:
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        return json.load(f)["documents"]
+
+def load_questions() -> list:
+    # {"question", "source", "article"}: the article of `source` that answers it
+    with open(QUESTIONS_PATH, encoding="utf-8") as f:
+        return json.load(f)["questions"]
+
+def article_heading(number: int) -> str:
+    return f"Article {number}"
+
+def document_text(document: dict, edition: int = 0) -> str:
+    parts = [document["source"]]
+    for article in document["articles"]:
+        text = article["text"]
+        if edition:
+            # Distinct content per copy: identical documents are deduplicated on ingestion
+            text = f"{text} (Édition {edition}.)"
+        parts.append(f"{article_heading(article['article'])} : {text}")
+    return "\n\n".join(parts) + "\n"
+
+def write_documents(directory: str, copies: int = 1) -> list:
+    """
+    Write `copies` editions of every fixture document to `directory`.
+    Returns (source name, path) pairs, in ingestion order.
+    """
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for edition in range(copies):
+        for n, document in enumerate(load_corpus()):
+            source = document["source"] if edition == 0 else f"{document['source']} (édition {edition})"
+            path = os.path.join(directory, f"{n:02d}_{edition:03d}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(document_text(document, edition))
+            written.append((source, path))
+    return written
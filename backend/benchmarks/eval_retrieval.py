@@ -0,0 +1,153 @@
+"""
+Retrieval quality and cost of chunking and top-k settings, measured with the
+labelled questions in fixtures/questions.json over the fixture legal corpus.
+
+    python -m benchmarks.eval_retrieval
+    python -m benchmarks.eval_retrieval --chunks 1000:200 500:100 300:50 --k 2 4 8
+    python -m benchmarks.eval_retrieval --model sentence-transformers/all-MiniLM-L6-v2 --output eval.json
+
+For each chunk size and overlap, the corpus is split with load_and_split and
+indexed from scratch. Every k is then run with both hybrid and dense-only
+search. A retrieved chunk is relevant when it comes from the expected source
+and contains the expected article heading. That heading is what the LLM has
+to cite. Each configuration reports recall@k, MRR, the average number of
+context tokens handed to the LLM, and search latency.
+
+With the default fake embeddings the run is offline, but dense scores are
+noise. Only the hybrid rows, carried by BM25, say anything about quality.
+Pass --model to get meaningful dense numbers. RAG_CHUNK_SIZE,
+RAG_CHUNK_OVERLAP and RAG_TOP_K set what the app actually uses.
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from app.core.config import settings
+from app.services.embedding_pipeline import EmbeddingPipeline
+from app.services.rag_service import load_and_split
+from app.services.vector_store import LegalVectorStore
+from benchmarks.corpus import article_heading, load_questions, write_documents
+
+MODES = {"hybrid": True, "dense": False}
+
+def chunking(value: str) -> tuple:
+    size, _, overlap = value.partition(":")
+    try:
+        size, overlap = int(size), int(overlap or 0)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected SIZE:OVERLAP, got {value!r}")
+    if overlap >= size:
+        raise argparse.ArgumentTypeError(f"overlap must be smaller than the chunk size in {value!r}")
+    return size, overlap
+
+def percentile_ms(samples, q) -> float:
+    return round(float(np.percentile(samples, q) * 1000), 3)
+
+def estimate_tokens(text: str) -> int:
+    # About four characters per token: enough to compare configurations offline
+    return (len(text) + 3) // 4
+
+def first_relevant_rank(docs, source: str, article: int) -> int:
+    # "Article 4 :" so that Article 40 does not count
+    heading = f"{article_heading(article)} :"
+    for rank, doc in enumerate(docs, start=1):
+        if doc.metadata.get("source") == source and heading in doc.page_content:
+            return rank
+    return 0
+
+def build_index(path: str, documents: list, embeddings, chunk_size: int, chunk_overlap: int):
+    vector_store = LegalVectorStore(path)
+    chunks = 0
+    for source, file_path in documents:
+        splits = load_and_split(file_path, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+        vector_store.upsert_document(source, splits, EmbeddingPipeline(embeddings), lambda **fields: None)
+        chunks += len(splits)
+    vector_store.save()
+    return LegalVectorStore.load(path), chunks
+
+def evaluate(vector_store, questions: list, vectors: list, k: int, hybrid: bool, repeat: int) -> dict:
+    latencies, ranks, tokens = [], [], []
+    for iteration in range(repeat):
+        for question, vector in zip(questions, vectors):
+            started = time.perf_counter()
+            docs = vector_store.search(vector, question["question"], k, hybrid=hybrid)
+            latencies.append(time.perf_counter() - started)
+            if iteration == 0:
+                # Results are deterministic: later passes only add latency samples
+                ranks.append(first_relevant_rank(docs, question["source"], question["article"]))
+                # The stuff-documents chain joins the chunks with blank lines
+                tokens.append(estimate_tokens("\n\n".join(doc.page_content for doc in docs)))
+    return {
+        "recall": round(sum(rank > 0 for rank in ranks) / len(ranks), 4),
+        "mrr": round(sum(1 / rank for rank in ranks if rank) / len(ranks), 4),
+        "avg_context_tokens": round(float(np.mean(tokens)), 1),
+        "p50_ms": percentile_ms(latencies, 50),
+        "p95_ms": percentile_ms(latencies, 95),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--chunks", type=chunking, nargs="+", metavar="SIZE:OVERLAP",
+        default=[(settings.RAG_CHUNK_SIZE, settings.RAG_CHUNK_OVERLAP), (500, 100), (250, 50)],
+    )
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=["hybrid", "dense"])
+    parser.add_argument("--repeat", type=int, default=5, help="Passes over the questions for latency samples")
+    parser.add_argument("--model", help="Use this sentence-transformers model instead of fake embeddings")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    if args.model:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(model_name=args.model)
+    else:
+        embeddings = DeterministicFakeEmbedding(size=384)
+
+    questions = load_questions()
+    embed_latencies, vectors = [], []
+    for question in questions:
+        started = time.perf_counter()
+        vectors.append(embeddings.embed_query(question["question"]))
+        embed_latencies.append(time.perf_counter() - started)
+    print(f"{len(questions)} questions, embedding p50={percentile_ms(embed_latencies, 50)}ms\n")
+    print(f"{'chunk':>6} {'overlap':>7} {'chunks':>6} {'k':>3} {'mode':6} {'recall':>7} {'mrr':>6} "
+          f"{'tokens':>7} {'p50_ms':>7} {'p95_ms':>7}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        documents = write_documents(os.path.join(workdir, "corpus"))
+        for chunk_size, chunk_overlap in args.chunks:
+            vector_store, chunks = build_index(
+                os.path.join(workdir, f"index_{chunk_size}_{chunk_overlap}"), documents, embeddings,
+                chunk_size, chunk_overlap,
+            )
+            for k in args.k:
+                for mode in args.modes:
+                    row = {
+                        "chunk_size": chunk_size,
+                        "chunk_overlap": chunk_overlap,
+                        "chunks": chunks,
+                        "k": k,
+                        "mode": mode,
+                        **evaluate(vector_store, questions, vectors, k, MODES[mode], args.repeat),
+                    }
+                    results.append(row)
+                    print(f"{chunk_size:>6} {chunk_overlap:>7} {chunks:>6} {k:>3} {mode:6} {row['recall']:>7.3f} "
+                          f"{row['mrr']:>6.3f} {row['avg_context_tokens']:>7.0f} {row['p50_ms']:>7.3f} "
+                          f"{row['p95_ms']:>7.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "embeddings": args.model or "fake-384",
+                "questions": len(questions),
+                "embed_p50_ms": percentile_ms(embed_latencies, 50),
+                "results": results,
+            }, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Chat model stand-in with a fixed latency, so benchmarks measure our own
+overhead and concurrency instead of the Gemini API.
+"""
+import asyncio
+import time
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+class SlowFakeChatModel(BaseChatModel):
+    latency: float = 2.0
+    answer: str = "Selon l'article 53 du Code du travail, le préavis dépend de l'ancienneté du salarié."
+
+    @property
+    def _llm_type(self) -> str:
+        return "slow-fake"
+
+    def _result(self) -> ChatResult:
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.answer))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        time.sleep(self.latency)
+        return self._result()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._result()
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        # Spread the latency over the tokens, like a streaming API would
+        tokens = self.answer.split(" ")
+        for i, token in enumerate(tokens):
+            await asyncio.sleep(self.latency / len(tokens))
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token if i == 0 else " " + token))
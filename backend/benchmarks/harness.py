@@ -0,0 +1,76 @@
+"""
+Shared setup for benchmarks that drive the app in-process. Import this module
+before anything from `app`: settings are read at import time, and this points
+them at a throwaway SQLite database.
+"""
+import asyncio
+import contextlib
+import os
+import socket
+import tempfile
+import uuid
+
+WORKDIR = tempfile.mkdtemp(prefix="jurid_benchmark_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{WORKDIR}/benchmark.db")
+# Measure the uncached paths
+os.environ["ANSWER_CACHE_ENABLED"] = "false"
+os.environ["EMBEDDING_CACHE_PATH"] = ""
+
+import httpx
+import numpy as np
+import uvicorn
+from app.db.database import AsyncSessionLocal, Base, async_engine
+from app.main import fastapi_app
+from app.models.models import User, UserRole
+from app.services import security
+
+async def create_user(password: str = None, role: str = UserRole.USER) -> User:
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as db:
+        user = User(
+            id=uuid.uuid4(),
+            email=f"{uuid.uuid4()}@example.com",
+            hashed_password=security.get_password_hash(password) if password else "-",
+            full_name="Benchmark",
+            role=role,
+        )
+        db.add(user)
+        await db.commit()
+    return user
+
+def client() -> httpx.AsyncClient:
+    # Lifespan events do not run: benchmarks install their own retrieval engine
+    transport = httpx.ASGITransport(app=fastapi_app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test", timeout=None)
+
+@contextlib.asynccontextmanager
+async def serve():
+    """
+    The app on a real uvicorn server in this event loop, for streaming responses
+    and Socket.IO: ASGITransport buffers the whole response. Yields the base URL.
+    """
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    server = uvicorn.Server(uvicorn.Config(fastapi_app, log_level="warning"))
+    task = asyncio.create_task(server.serve(sockets=[listener]))
+    try:
+        while not server.started:
+            if task.done():
+                task.result()
+            await asyncio.sleep(0.05)
+        yield f"http://127.0.0.1:{listener.getsockname()[1]}"
+    finally:
+        server.should_exit = True
+        await task
+        listener.close()
+
+def percentiles(latencies: list) -> dict:
+    if not latencies:
+        return {"count": 0}
+    return {
+        "count": len(latencies),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 1),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 1),
+    }
@@ -0,0 +1,95 @@
+"""
+Latency of dense-only vs hybrid (dense + BM25) retrieval on a synthetic legal corpus.
+
+    python -m benchmarks.hybrid_benchmark --articles 20000 --queries 300
+    python -m benchmarks.hybrid_benchmark --model sentence-transformers/all-MiniLM-L6-v2
+
+The default embeddings are deterministic fakes so the run is offline; they make
+dense hit rates meaningless but keep the latency comparison honest.
+"""
+import argparse
+import json
+import random
+import tempfile
+import time
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from app.services.embedding_pipeline import EmbeddingPipeline
+from app.services.vector_store import LegalVectorStore
+
+CODES = ["Code du travail", "Code pénal", "Code de la famille", "Code des obligations et contrats", "Code de commerce"]
+VOCABULARY = (
+    "contrat salarié employeur licenciement préavis indemnité congé durée travail tribunal peine amende "
+    "mariage divorce pension garde héritier succession obligation créancier débiteur société commerçant "
+    "faillite responsabilité préjudice réparation délai appel jugement nullité consentement capacité"
+).split()
+
+def synthetic_corpus(articles: int, rng: random.Random) -> dict:
+    corpus = {}
+    for n in range(1, articles + 1):
+        code = CODES[n % len(CODES)]
+        words = " ".join(rng.choice(VOCABULARY) for _ in range(rng.randint(40, 120)))
+        corpus.setdefault(code, []).append(
+            Document(page_content=f"Article {n} du {code} : {words}.", metadata={"article": n})
+        )
+    return corpus
+
+def percentile_ms(samples, q) -> float:
+    return float(np.percentile(samples, q) * 1000)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--model", help="Use this sentence-transformers model instead of fake embeddings")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    if args.model:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(model_name=args.model)
+    else:
+        embeddings = DeterministicFakeEmbedding(size=384)
+
+    rng = random.Random(0)
+    corpus = synthetic_corpus(args.articles, rng)
+
+    with tempfile.TemporaryDirectory() as path:
+        vector_store = LegalVectorStore(path)
+        started = time.perf_counter()
+        for code, splits in corpus.items():
+            vector_store.upsert_document(code, splits, EmbeddingPipeline(embeddings), lambda **fields: None)
+        vector_store.save()
+        print(f"Indexed {args.articles} articles in {time.perf_counter() - started:.1f}s")
+
+        vector_store = LegalVectorStore.load(path)
+        queries = []
+        for _ in range(args.queries):
+            n = rng.randint(1, args.articles)
+            queries.append((n, f"Que dit l'article {n} du {CODES[n % len(CODES)]} sur le {rng.choice(VOCABULARY)} ?"))
+
+        results = {}
+        for mode, hybrid in (("dense", False), ("hybrid", True)):
+            latencies, hits = [], 0
+            for n, query in queries:
+                vector = embeddings.embed_query(query)
+                started = time.perf_counter()
+                docs = vector_store.search(vector, query, args.k, hybrid=hybrid)
+                latencies.append(time.perf_counter() - started)
+                hits += any(doc.metadata.get("article") == n for doc in docs)
+            results[mode] = {
+                "p50_ms": round(percentile_ms(latencies, 50), 3),
+                "p95_ms": round(percentile_ms(latencies, 95), 3),
+                "p99_ms": round(percentile_ms(latencies, 99), 3),
+                f"article_hit@{args.k}": round(hits / len(queries), 4),
+            }
+            print(f"{mode:6} " + " ".join(f"{key}={value}" for key, value in results[mode].items()))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"articles": args.articles, "k": args.k, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Latency of ordinary endpoints while a burst of logins hammers Argon2.
+
+    pip install httpx aiosqlite
+    python -m benchmarks.login_storm --logins 500 --probes 200
+
+A probe client keeps calling GET /auth/me and GET /experts/ (the DB path) while
+the storm runs; their p99 is compared with a quiet baseline. Logins rejected
+with 503 by the hashing pool's backpressure are counted separately.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+# Must come before the app imports
+from benchmarks import harness
+from app.core.config import settings
+
+PASSWORD = "benchmark-password"
+
+async def probe(client, headers: dict, stop: asyncio.Event, interval: float) -> dict:
+    latencies = {"/auth/me": [], "/experts/": []}
+    while not stop.is_set():
+        for path, samples in latencies.items():
+            started = time.perf_counter()
+            response = await client.get(f"{settings.API_V1_STR}{path}", headers=headers)
+            response.raise_for_status()
+            samples.append(time.perf_counter() - started)
+        await asyncio.sleep(interval)
+    return latencies
+
+async def probe_for(client, headers: dict, count: int, interval: float) -> dict:
+    stop = asyncio.Event()
+    task = asyncio.create_task(probe(client, headers, stop, interval))
+    await asyncio.sleep(count * interval)
+    stop.set()
+    return await task
+
+async def storm(client, email: str, count: int, concurrency: int) -> dict:
+    statuses, latencies = {}, []
+    limit = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with limit:
+            started = time.perf_counter()
+            response = await client.post(
+                f"{settings.API_V1_STR}/auth/login", data={"username": email, "password": PASSWORD}
+            )
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(count)))
+    return {
+        "wall_seconds": round(time.perf_counter() - started, 3),
+        "statuses": statuses,
+        **harness.percentiles(latencies),
+    }
+
+async def run(args) -> dict:
+    user = await harness.create_user(password=PASSWORD)
+    async with harness.client() as client:
+        response = await client.post(
+            f"{settings.API_V1_STR}/auth/login", data={"username": user.email, "password": PASSWORD}
+        )
+        response.raise_for_status()
+        headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+        baseline = await probe_for(client, headers, args.probes, args.interval)
+
+        stop = asyncio.Event()
+        probing = asyncio.create_task(probe(client, headers, stop, args.interval))
+        logins = await storm(client, user.email, args.logins, args.concurrency)
+        stop.set()
+        during = await probing
+
+    results = {
+        "hash_workers": settings.PASSWORD_HASH_WORKERS,
+        "hash_queue": settings.PASSWORD_HASH_QUEUE,
+        "argon2": {
+            "time_cost": settings.ARGON2_TIME_COST,
+            "memory_cost": settings.ARGON2_MEMORY_COST,
+            "parallelism": settings.ARGON2_PARALLELISM,
+        },
+        "logins": logins,
+        "baseline": {path: harness.percentiles(samples) for path, samples in baseline.items()},
+        "during_storm": {path: harness.percentiles(samples) for path, samples in during.items()},
+    }
+
+    print(f"{args.logins} logins, {args.concurrency} in flight, hashing pool {settings.PASSWORD_HASH_WORKERS}+{settings.PASSWORD_HASH_QUEUE}")
+    print(f"logins: {logins['statuses']} p50={logins.get('p50_ms')}ms p99={logins.get('p99_ms')}ms in {logins['wall_seconds']}s")
+    for path in baseline:
+        quiet, busy = results["baseline"][path], results["during_storm"][path]
+        print(f"{path:12} p99 quiet={quiet.get('p99_ms')}ms during storm={busy.get('p99_ms')}ms")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=100, help="Logins in flight at once")
+    parser.add_argument("--probes", type=int, default=100, help="Probe rounds for the quiet baseline")
+    parser.add_argument("--interval", type=float, default=0.02, help="Seconds between probe rounds")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
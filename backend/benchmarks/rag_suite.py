@@ -0,0 +1,236 @@
+"""
+End-to-end RAG benchmark on the fixture legal corpus, fully offline: fake
+embeddings (or --model) and a fake LLM with a fixed latency.
+
+    python -m benchmarks.rag_suite
+    python -m benchmarks.rag_suite --copies 50 --concurrency 1 10 50 --latency 1.5
+    python -m benchmarks.rag_suite --compare rag_suite_1a2b3c4.json
+
+Stages: ingestion throughput through load_and_split and upsert_document,
+retrieval latency (embedding and search), /chat/query latency at each
+concurrency level, and the resident memory of this process, which plays the
+part of one worker. Results are written to rag_suite_<commit>.json unless
+--output says otherwise, so runs on different commits can be compared.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+# Must come before the app imports
+from benchmarks import harness
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from app.api import deps
+from app.core.config import settings
+from app.main import fastapi_app
+from app.services import rag_service
+from benchmarks.corpus import load_corpus, write_documents
+from benchmarks.fake_llm import SlowFakeChatModel
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def git_commit() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND_DIR, capture_output=True, text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{commit}-dirty" if dirty else commit
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return round(pages * os.sysconf("SC_PAGE_SIZE") / 2**20, 1)
+    except (OSError, ValueError):
+        # No /proc outside Linux: the peak is the closest we have
+        return peak_rss_mb()
+
+def directory_mb(path: str) -> float:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return round(total / 2**20, 2)
+
+def questions() -> list:
+    # One question per fixture article, phrased the way users ask
+    return [
+        f"Que prévoit l'article {article['article']} du {document['source']} ?"
+        for document in load_corpus()
+        for article in document["articles"]
+    ]
+
+def run_ingestion(engine, copies: int) -> dict:
+    documents = write_documents(os.path.join(harness.WORKDIR, "corpus"), copies)
+    chunks, split_seconds = 0, 0.0
+    started = time.perf_counter()
+    for source, path in documents:
+        split_started = time.perf_counter()
+        splits = rag_service.load_and_split(path)
+        split_seconds += time.perf_counter() - split_started
+        chunks += engine.upsert_document(source, splits)["chunks_added"]
+    seconds = time.perf_counter() - started
+    return {
+        "documents": len(documents),
+        "chunks": chunks,
+        "seconds": round(seconds, 3),
+        "split_seconds": round(split_seconds, 3),
+        "documents_per_second": round(len(documents) / seconds, 2),
+        "chunks_per_second": round(chunks / seconds, 2),
+        "index_mb": directory_mb(engine.index_path),
+    }
+
+def run_retrieval(engine, count: int) -> dict:
+    store = engine.vector_store
+    pool = questions()
+    embed, search = [], []
+    for i in range(count):
+        question = pool[i % len(pool)]
+        started = time.perf_counter()
+        vector = engine.embeddings.embed_query(question)
+        embedded = time.perf_counter()
+        store.search(vector, question, k=settings.RAG_TOP_K)
+        embed.append(embedded - started)
+        search.append(time.perf_counter() - embedded)
+    return {
+        "k": settings.RAG_TOP_K,
+        "embed": harness.percentiles(embed),
+        "search": harness.percentiles(search),
+        "embed_and_search": harness.percentiles([a + b for a, b in zip(embed, search)]),
+    }
+
+async def run_chat(client, concurrency: int, count: int) -> dict:
+    pool = questions()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(f"{settings.API_V1_STR}/chat/query", json={"message": pool[i % len(pool)]})
+            response.raise_for_status()
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(one(i) for i in range(count)))
+    wall = time.perf_counter() - started
+    return {
+        "requests": count,
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(count / wall, 2),
+        **harness.percentiles(list(latencies)),
+    }
+
+async def run(args) -> dict:
+    memory = {"start": rss_mb()}
+    if args.model:
+        from langchain_community.embeddings import HuggingFaceEmbeddings
+        embeddings = HuggingFaceEmbeddings(model_name=args.model)
+    else:
+        embeddings = DeterministicFakeEmbedding(size=384)
+    engine = rag_service.RetrievalEngine(
+        index_path=os.path.join(harness.WORKDIR, "faiss_index"),
+        embeddings=embeddings,
+        llm=SlowFakeChatModel(latency=args.latency),
+    )
+    rag_service._engine = engine
+    memory["engine_loaded"] = rss_mb()
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "embeddings": args.model or "fake-384",
+            "llm_latency": args.latency,
+            "copies": args.copies,
+            "faiss_index_type": settings.FAISS_INDEX_TYPE,
+            "hybrid_search": settings.HYBRID_SEARCH_ENABLED,
+            "chunk_size": settings.RAG_CHUNK_SIZE,
+            "chunk_overlap": settings.RAG_CHUNK_OVERLAP,
+        },
+    }
+
+    results["ingestion"] = run_ingestion(engine, args.copies)
+    memory["after_ingestion"] = rss_mb()
+    ingestion = results["ingestion"]
+    print(f"ingestion  {ingestion['documents']} documents, {ingestion['chunks']} chunks in {ingestion['seconds']:.1f}s "
+          f"({ingestion['chunks_per_second']:.0f} chunks/s)")
+
+    results["retrieval"] = run_retrieval(engine, args.queries)
+    memory["after_retrieval"] = rss_mb()
+    for name in ("embed", "search", "embed_and_search"):
+        r = results["retrieval"][name]
+        print(f"retrieval  {name:17} p50={r['p50_ms']}ms p95={r['p95_ms']}ms p99={r['p99_ms']}ms")
+
+    user = await harness.create_user()
+    fastapi_app.dependency_overrides[deps.get_current_user] = lambda: user
+    results["chat"] = {}
+    async with harness.client() as client:
+        for concurrency in args.concurrency:
+            r = await run_chat(client, concurrency, args.requests)
+            results["chat"][f"concurrency_{concurrency}"] = r
+            print(f"chat       concurrency={concurrency:<4} rps={r['requests_per_second']:.1f} "
+                  f"p50={r['p50_ms']}ms p95={r['p95_ms']}ms p99={r['p99_ms']}ms")
+    memory["after_chat"] = rss_mb()
+    memory["peak"] = peak_rss_mb()
+    results["memory_mb"] = memory
+    print(f"memory     " + " ".join(f"{name}={value}MB" for name, value in memory.items()))
+    return results
+
+def flatten(results: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+def compare(previous: dict, current: dict):
+    print(f"\nchanges since {previous.get('commit')}:")
+    before, after = flatten(previous), flatten(current)
+    for key in sorted(before.keys() & after.keys()):
+        if key.startswith("config.") or before[key] == 0:
+            continue
+        change = (after[key] - before[key]) / before[key] * 100
+        print(f"  {key:45} {before[key]:>10} -> {after[key]:>10} ({change:+.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=10, help="Editions of the fixture corpus to ingest")
+    parser.add_argument("--queries", type=int, default=500, help="Retrieval queries")
+    parser.add_argument("--requests", type=int, default=100, help="/chat/query requests per concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--latency", type=float, default=1.0, help="Seconds the fake LLM takes per answer")
+    parser.add_argument("--model", help="Use this sentence-transformers model instead of fake embeddings")
+    parser.add_argument("--output", help="Results path (default: rag_suite_<commit>.json)")
+    parser.add_argument("--compare", help="Earlier results to print the differences against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    output = args.output or f"rag_suite_{results['commit']}.json"
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+if __name__ == "__main__":
+    main()
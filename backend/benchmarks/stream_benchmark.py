@@ -0,0 +1,172 @@
+"""
+Time to first byte of streamed chat answers, through a real uvicorn server:
+POST /chat/query/stream (Server-Sent Events) and the chat_query Socket.IO
+event, with a fake LLM that spreads its latency over the answer tokens.
+
+    pip install "python-socketio[asyncio_client]" uvicorn
+    python -m benchmarks.stream_benchmark --requests 50 --concurrency 1 10 50 --latency 2
+
+For each stream we record when the sources, the first token and done arrive,
+measured from the request. Sources come right after retrieval, so their
+latency should stay far below the LLM latency while done follows it.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+# Must come before the app imports
+from benchmarks import harness
+import httpx
+import socketio
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from app.core.config import settings
+from app.services import rag_service, security
+from benchmarks.fake_llm import SlowFakeChatModel
+
+TRANSPORTS = ["sse", "socketio"]
+
+def corpus(articles: int = 200) -> list:
+    return [
+        Document(page_content=f"Article {n} du Code du travail : dispositions relatives au préavis n°{n}.")
+        for n in range(1, articles + 1)
+    ]
+
+def install_engine(latency: float, index_path: str) -> rag_service.RetrievalEngine:
+    engine = rag_service.RetrievalEngine(
+        index_path=index_path,
+        embeddings=DeterministicFakeEmbedding(size=384),
+        llm=SlowFakeChatModel(latency=latency),
+    )
+    engine.upsert_document("Code du travail", corpus())
+    rag_service._engine = engine
+    return engine
+
+async def stream_sse(client: httpx.AsyncClient, base_url: str, token: str, message: str) -> list:
+    """
+    (seconds since the request, event, payload) for every event of one
+    /chat/query/stream answer.
+    """
+    events = []
+    started = time.perf_counter()
+    async with client.stream(
+        "POST", f"{base_url}{settings.API_V1_STR}/chat/query/stream",
+        json={"message": message}, headers={"Authorization": f"Bearer {token}"},
+    ) as response:
+        response.raise_for_status()
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                events.append((time.perf_counter() - started, event, json.loads(line[len("data: "):])))
+    return events
+
+async def connect(base_url: str, token: str) -> socketio.AsyncClient:
+    client = socketio.AsyncClient()
+    await client.connect(base_url, transports=["websocket"], auth={"token": token})
+    return client
+
+async def stream_socket(client: socketio.AsyncClient, message: str, timeout: float) -> list:
+    """
+    Same as stream_sse for the chat_query event, on an already connected client.
+    """
+    events = []
+    finished = asyncio.Event()
+    started = time.perf_counter()
+
+    def on(event):
+        async def handler(payload):
+            events.append((time.perf_counter() - started, event, payload))
+            if event in ("done", "error"):
+                finished.set()
+        return handler
+
+    for event in ("sources", "token", "done", "error"):
+        client.on(f"chat_{event}", on(event))
+    await client.emit("chat_query", {"message": message})
+    await asyncio.wait_for(finished.wait(), timeout)
+    return events
+
+def arrival(events: list, name: str):
+    return next((seconds for seconds, event, _ in events if event == name), None)
+
+def summarize(streams: list, wall: float) -> dict:
+    results = {
+        "streams": len(streams),
+        "wall_seconds": round(wall, 3),
+        "errors": sum(arrival(events, "error") is not None for events in streams),
+    }
+    for name, event in (("ttfb", None), ("sources", "sources"), ("first_token", "token"), ("done", "done")):
+        if event is None:
+            samples = [events[0][0] for events in streams if events]
+        else:
+            samples = [arrival(events, event) for events in streams]
+        results[name] = harness.percentiles([sample for sample in samples if sample is not None])
+    return results
+
+async def run_level(transport: str, base_url: str, token: str, concurrency: int, count: int, timeout: float) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    if transport == "sse":
+        async with httpx.AsyncClient(timeout=None, limits=httpx.Limits(max_connections=concurrency)) as client:
+            async def one(i):
+                async with semaphore:
+                    return await stream_sse(client, base_url, token, f"Question {i} sur le préavis")
+
+            started = time.perf_counter()
+            streams = await asyncio.gather(*(one(i) for i in range(count)))
+            return summarize(list(streams), time.perf_counter() - started)
+
+    # One connection per concurrent stream, opened before the clock starts
+    clients = [await connect(base_url, token) for _ in range(concurrency)]
+    try:
+        async def worker(client, indexes):
+            return [await stream_socket(client, f"Question {i} sur le préavis", timeout) for i in indexes]
+
+        started = time.perf_counter()
+        batches = await asyncio.gather(*(
+            worker(client, range(n, count, concurrency)) for n, client in enumerate(clients)
+        ))
+        return summarize([events for batch in batches for events in batch], time.perf_counter() - started)
+    finally:
+        for client in clients:
+            await client.disconnect()
+
+async def run(args) -> dict:
+    user = await harness.create_user()
+    token = security.create_access_token(user.id)
+    install_engine(args.latency, f"{harness.WORKDIR}/faiss_index")
+
+    results = {"llm_latency": args.latency}
+    async with harness.serve() as base_url:
+        for transport in args.transports:
+            results[transport] = {}
+            for concurrency in args.concurrency:
+                r = await run_level(transport, base_url, token, concurrency, args.requests, args.timeout)
+                results[transport][f"concurrency_{concurrency}"] = r
+                print(
+                    f"{transport:8} concurrency={concurrency:<4} errors={r['errors']} "
+                    f"ttfb p50={r['ttfb'].get('p50_ms')}ms p95={r['ttfb'].get('p95_ms')}ms "
+                    f"first_token p50={r['first_token'].get('p50_ms')}ms done p50={r['done'].get('p50_ms')}ms"
+                )
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="Streams per transport and concurrency level")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--transports", nargs="+", choices=TRANSPORTS, default=TRANSPORTS)
+    parser.add_argument("--latency", type=float, default=2.0, help="Seconds the fake LLM takes per answer")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for a Socket.IO answer")
+    parser.add_argument("--output", help="Write results as JSON to this path")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
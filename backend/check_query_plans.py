@@ -0,0 +1,89 @@
+"""
+EXPLAIN every hot router query against the configured Postgres database and
+fail when one of them needs a sequential scan.
+
+    python check_query_plans.py
+
+Sequential scans are disabled for the session, so the planner picks an index
+whenever one can serve the query even on a near-empty development database;
+a Seq Scan left in the plan means no usable index exists.
+"""
+import json
+import sys
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import desc, func, or_, select, text, tuple_
+from app.db.database import engine
+from app.models.models import (
+    Appointment, Consultation, ConsultationStatus, Conversation, ExpertAvailability,
+    Message, User, UserEvent, UserRole,
+)
+
+SOME_ID = uuid.uuid4()
+NOW = datetime.now(timezone.utc)
+
+# (name, statement) mirroring the queries in app/api
+QUERIES = [
+    ("deps.get_current_user", select(User).where(User.id == SOME_ID)),
+    ("auth.login", select(User).where(User.email == "someone@example.com")),
+    ("experts.read_experts", select(User).where(User.role == UserRole.EXPERT)),
+    ("chat.latest_conversation", select(Conversation).where(Conversation.user_id == SOME_ID)
+        .order_by(desc(Conversation.created_at)).limit(1)),
+    ("chat.list_conversations", select(Conversation).where(Conversation.user_id == SOME_ID)
+        .where(tuple_(Conversation.created_at, Conversation.id) < tuple_(NOW, SOME_ID))
+        .order_by(Conversation.created_at.desc(), Conversation.id.desc()).limit(21)),
+    ("chat.list_messages", select(Message).where(Message.conversation_id == SOME_ID)
+        .where(tuple_(Message.created_at, Message.id) < tuple_(NOW, SOME_ID))
+        .order_by(Message.created_at.desc(), Message.id.desc()).limit(51)),
+    ("consultations.user", select(Consultation).where(Consultation.user_id == SOME_ID).limit(100)),
+    ("consultations.expert", select(Consultation).where(
+        (Consultation.expert_id == SOME_ID) | (Consultation.expert_id == None)).limit(100)),
+    ("consultations.claim", select(Consultation.id).where(
+        Consultation.status == ConsultationStatus.OPEN, Consultation.expert_id == None,
+        or_(Consultation.domain == "Droit du travail", Consultation.domain == None))
+        .order_by(Consultation.created_at, Consultation.id).limit(1)),
+    ("appointments.user", select(Appointment).where(Appointment.user_id == SOME_ID)),
+    ("appointments.expert", select(Appointment).where(Appointment.expert_id == SOME_ID)),
+    ("booking.find_overlap", select(Appointment).where(
+        Appointment.expert_id == SOME_ID, Appointment.status.in_(["pending", "confirmed"]), Appointment.start_time < NOW)
+        .order_by(Appointment.start_time.desc()).limit(1)),
+    ("availability.expert", select(ExpertAvailability).where(ExpertAvailability.expert_id == SOME_ID)),
+    ("notifications.events_after", select(UserEvent).where(UserEvent.user_id == SOME_ID, UserEvent.id > 0)
+        .order_by(UserEvent.id).limit(500)),
+    ("notifications.settled_event_id", select(func.max(UserEvent.id)).where(
+        UserEvent.user_id == SOME_ID, UserEvent.created_at < NOW, UserEvent.id <= 1000)),
+]
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+def check_plans(conn) -> list:
+    failures = []
+    for name, statement in QUERIES:
+        sql = statement.compile(conn, compile_kwargs={"literal_binds": True})
+        plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        seq_scans = [node["Relation Name"] for node in plan_nodes(plan[0]["Plan"]) if node["Node Type"] == "Seq Scan"]
+        status = "SEQ SCAN on " + ", ".join(seq_scans) if seq_scans else "ok"
+        print(f"{name:34} {status}")
+        if seq_scans:
+            failures.append(name)
+    return failures
+
+def main():
+    if engine.dialect.name != "postgresql":
+        print(f"Query plans are only checked on PostgreSQL, not {engine.dialect.name}")
+        return 0
+    with engine.connect() as conn:
+        conn.execute(text("SET enable_seqscan = off"))
+        failures = check_plans(conn)
+    if failures:
+        print(f"{len(failures)} queries fall back to sequential scans: {', '.join(failures)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
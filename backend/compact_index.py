@@ -0,0 +1,9 @@
+from app.services import rag_service
+
+def compact_index():
+    print("Compacting FAISS index...")
+    chunks = rag_service.get_engine().compact()
+    print(f"Index rebuilt with {chunks} live chunks.")
+
+if __name__ == "__main__":
+    compact_index()
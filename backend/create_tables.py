@@ -1,9 +1,9 @@
-from app.db.database import engine, Base
-from app.models import models
+from update_schema import update_schema
 
 def create_tables():
+    # Tables and indexes come from the migrations in migrations/versions
     print("Creating tables...")
-    Base.metadata.create_all(bind=engine)
+    update_schema()
     print("Tables created successfully.")
 
 if __name__ == "__main__":
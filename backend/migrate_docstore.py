@@ -0,0 +1,10 @@
+from app.services import legacy_docstore
+from app.services.rag_service import FAISS_INDEX_PATH
+
+def migrate_docstore(path: str = FAISS_INDEX_PATH):
+    # The engine also runs this when it loads a legacy index
+    if not legacy_docstore.migrate(path):
+        print("No legacy docstore found. Nothing to migrate.")
+
+if __name__ == "__main__":
+    migrate_docstore()
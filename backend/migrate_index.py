@@ -0,0 +1,16 @@
+from app.core.config import settings
+from app.services import index_factory, rag_service
+
+def migrate_index():
+    vector_store = rag_service.get_engine().vector_store
+    if vector_store is None:
+        print("No FAISS index found. Nothing to migrate.")
+        return
+
+    current = type(index_factory.base_index(vector_store.index)).__name__
+    print(f"Rebuilding {current} index ({vector_store.index.ntotal} vectors) as {settings.FAISS_INDEX_TYPE}...")
+    chunks = rag_service.get_engine().compact()
+    print(f"Index migrated to {settings.FAISS_INDEX_TYPE} with {chunks} chunks.")
+
+if __name__ == "__main__":
+    migrate_index()
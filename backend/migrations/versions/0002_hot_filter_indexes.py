@@ -0,0 +1,37 @@
+"""indexes for the columns every router filters on
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+if_not_exists: the chat pagination indexes may already have been created by
+create_tables.py.
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns)
+INDEXES = [
+    ("ix_users_role", "users", ["role"]),
+    ("ix_conversations_user_created_id", "conversations", ["user_id", "created_at", "id"]),
+    ("ix_messages_conversation_created_id", "messages", ["conversation_id", "created_at", "id"]),
+    ("ix_consultations_user_created", "consultations", ["user_id", "created_at"]),
+    ("ix_consultations_expert_status", "consultations", ["expert_id", "status"]),
+    ("ix_consultations_status_created", "consultations", ["status", "created_at"]),
+    ("ix_appointments_user_start", "appointments", ["user_id", "start_time"]),
+    ("ix_appointments_expert_start", "appointments", ["expert_id", "start_time"]),
+    ("ix_appointments_consultation", "appointments", ["consultation_id"]),
+    ("ix_expert_availability_expert", "expert_availability", ["expert_id"]),
+]
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,35 @@
+"""exclusion constraint: no overlapping active appointments per expert
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+Last line of defence behind app.services.booking: even two transactions that
+both pass the checks cannot commit overlapping bookings. Fails if overlapping
+active appointments already exist; cancel the duplicates first.
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+ACTIVE_STATUSES = "('pending', 'expert_proposed_new_time', 'user_proposed_new_time', 'confirmed')"
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(
+        f"""
+        ALTER TABLE appointments ADD CONSTRAINT appointments_no_overlap
+        EXCLUDE USING gist (expert_id WITH =, tstzrange(start_time, end_time, '[)') WITH &&)
+        WHERE (status IN {ACTIVE_STATUSES})
+        """
+    )
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("ALTER TABLE appointments DROP CONSTRAINT IF EXISTS appointments_no_overlap")
@@ -0,0 +1,52 @@
+"""expert_availability: real date/time types instead of strings
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+day_of_week "0".."6" becomes a smallint, specific_date a date, and the
+"HH:MM" start/end times become time columns. Stored days came from JS
+getDay() (Sunday = 0); they are shifted to Python weekday() (Monday = 0),
+which the frontend and the slot search now use. Also indexes experts.domain
+for the per-domain slot search.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table("expert_availability") as batch:
+        batch.alter_column(
+            "day_of_week", type_=sa.SmallInteger(), existing_nullable=True,
+            postgresql_using="(NULLIF(day_of_week, '')::smallint + 6) % 7",
+        )
+        batch.alter_column(
+            "specific_date", type_=sa.Date(), existing_nullable=True,
+            postgresql_using="specific_date::date",
+        )
+        batch.alter_column("start_time", type_=sa.Time(), existing_nullable=False, postgresql_using="start_time::time")
+        batch.alter_column("end_time", type_=sa.Time(), existing_nullable=False, postgresql_using="end_time::time")
+    if op.get_bind().dialect.name != "postgresql":
+        # The batch copy casts without the shift
+        op.execute("UPDATE expert_availability SET day_of_week = (day_of_week + 6) % 7 WHERE day_of_week IS NOT NULL")
+    op.create_index("ix_experts_domain", "experts", ["domain"], if_not_exists=True)
+
+def downgrade():
+    op.drop_index("ix_experts_domain", table_name="experts", if_exists=True)
+    if op.get_bind().dialect.name != "postgresql":
+        op.execute("UPDATE expert_availability SET day_of_week = (day_of_week + 1) % 7 WHERE day_of_week IS NOT NULL")
+    with op.batch_alter_table("expert_availability") as batch:
+        batch.alter_column(
+            "day_of_week", type_=sa.String(), existing_nullable=True,
+            postgresql_using="((day_of_week + 1) % 7)::text",
+        )
+        batch.alter_column(
+            "specific_date", type_=sa.DateTime(), existing_nullable=True,
+            postgresql_using="specific_date::timestamp",
+        )
+        batch.alter_column("start_time", type_=sa.String(), existing_nullable=False, postgresql_using="to_char(start_time, 'HH24:MI')")
+        batch.alter_column("end_time", type_=sa.String(), existing_nullable=False, postgresql_using="to_char(end_time, 'HH24:MI')")
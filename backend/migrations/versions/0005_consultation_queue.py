@@ -0,0 +1,24 @@
+"""consultations.domain and a partial index over the unclaimed queue
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column("consultations", sa.Column("domain", sa.String(), nullable=True))
+    op.create_index(
+        "ix_consultations_open_queue", "consultations", ["domain", "created_at"],
+        postgresql_where=sa.text("status = 'open' AND expert_id IS NULL"),
+    )
+
+def downgrade():
+    op.drop_index("ix_consultations_open_queue", table_name="consultations")
+    op.drop_column("consultations", "domain")
@@ -0,0 +1,49 @@
+"""full-text search: generated tsvector columns with GIN indexes
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+Each searchable table gets a stored generated `search_vector`, so Postgres
+keeps it current on every INSERT/UPDATE. Text is indexed with both the french
+and arabic configurations (arabic needs PostgreSQL 12+); queries are parsed
+with both and OR-ed. Postgres only: other databases fall back to LIKE in
+app.services.search.
+"""
+from alembic import op
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def document(weighted_columns) -> str:
+    parts = []
+    for column, weight in weighted_columns:
+        for config in ("french", "arabic"):
+            parts.append(f"setweight(to_tsvector('{config}', coalesce({column}, '')), '{weight}')")
+    return " || ".join(parts)
+
+# table -> [(column, weight)]
+SEARCHABLE = {
+    "consultations": [("subject", "A"), ("description", "B"), ("expert_response", "C")],
+    "messages": [("content", "B")],
+    "legal_sources": [("title", "A"), ("content", "B")],
+}
+
+def upgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table, columns in SEARCHABLE.items():
+        op.execute(
+            f"ALTER TABLE {table} ADD COLUMN search_vector tsvector "
+            f"GENERATED ALWAYS AS ({document(columns)}) STORED"
+        )
+        op.execute(f"CREATE INDEX ix_{table}_search_vector ON {table} USING gin (search_vector)")
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    for table in SEARCHABLE:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_search_vector")
+        op.execute(f"ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector")
@@ -0,0 +1,31 @@
+"""user_events: per-user state change log for push notifications and replay
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "user_events",
+        sa.Column("id", sa.BigInteger().with_variant(sa.Integer(), "sqlite"), primary_key=True, autoincrement=True),
+        sa.Column("user_id", postgresql.UUID(as_uuid=True), sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("type", sa.String(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_user_events_user_id", "user_events", ["user_id", "id"])
+    op.create_index("ix_user_events_created", "user_events", ["created_at"])
+
+def downgrade():
+    op.drop_index("ix_user_events_created", table_name="user_events")
+    op.drop_index("ix_user_events_user_id", table_name="user_events")
+    op.drop_table("user_events")
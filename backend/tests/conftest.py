@@ -0,0 +1,2 @@
+# Must come before the app imports: points the settings at a throwaway SQLite database
+from benchmarks import harness  # noqa: F401
@@ -0,0 +1,58 @@
+import asyncio
+import uuid
+import httpx
+import pytest
+from sqlalchemy import select
+from app.db.database import AsyncSessionLocal, async_engine
+from app.models.models import Message, MessageRole
+from app.services import rag_service, security
+from benchmarks import harness, stream_benchmark
+from benchmarks.fake_llm import SlowFakeChatModel
+
+LATENCY = 1.0
+QUESTION = "Quel est le préavis prévu par l'article 53 ?"
+
+async def stream(transport: str) -> tuple:
+    user = await harness.create_user()
+    token = security.create_access_token(user.id)
+    try:
+        async with harness.serve() as base_url:
+            if transport == "sse":
+                async with httpx.AsyncClient(timeout=None) as client:
+                    events = await stream_benchmark.stream_sse(client, base_url, token, QUESTION)
+            else:
+                client = await stream_benchmark.connect(base_url, token)
+                try:
+                    events = await stream_benchmark.stream_socket(client, QUESTION, timeout=30)
+                finally:
+                    await client.disconnect()
+        done = events[-1][2]
+        async with AsyncSessionLocal() as db:
+            messages = (await db.execute(
+                select(Message).where(Message.conversation_id == uuid.UUID(done["conversation_id"]))
+            )).scalars().all()
+    finally:
+        # The next test runs on another event loop
+        await async_engine.dispose()
+    return events, {message.role: message for message in messages}
+
+@pytest.mark.parametrize("transport", stream_benchmark.TRANSPORTS)
+def test_streams_sources_before_the_answer(tmp_path, monkeypatch, transport):
+    monkeypatch.setattr(rag_service, "_engine", None)
+    stream_benchmark.install_engine(LATENCY, str(tmp_path))
+    events, messages = asyncio.run(stream(transport))
+
+    names = [event for _, event, _ in events]
+    assert names[0] == "sources" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"} and len(names) > 3
+    # Sources only wait for retrieval, the answer for the whole LLM latency
+    assert events[0][0] < LATENCY / 2
+    assert events[-1][0] >= LATENCY
+    assert events[0][2]["sources"]
+
+    done = events[-1][2]
+    answer = "".join(payload["token"] for _, event, payload in events if event == "token")
+    assert answer == done["response"] == SlowFakeChatModel().answer
+    assert messages[MessageRole.USER].content == QUESTION
+    assert messages[MessageRole.ASSISTANT].content == answer
+    assert messages[MessageRole.ASSISTANT].citations == done["sources"]
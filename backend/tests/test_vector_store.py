@@ -0,0 +1,80 @@
+import faiss
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from app.core.config import settings
+from app.services import index_factory
+from app.services.embedding_pipeline import EmbeddingPipeline
+from app.services.vector_store import LegalVectorStore
+
+def splits(source: str, count: int) -> list:
+    return [Document(page_content=f"{source} article {n} : texte {n * 7919 % 104729}") for n in range(count)]
+
+def upsert(vector_store, source, documents, embeddings):
+    return vector_store.upsert_document(source, documents, EmbeddingPipeline(embeddings), lambda **fields: None)
+
+@pytest.mark.parametrize("index_type", index_factory.INDEX_TYPES)
+def test_amending_a_document_keeps_other_slots(tmp_path, monkeypatch, index_type):
+    monkeypatch.setattr(settings, "FAISS_INDEX_TYPE", index_type)
+    embeddings = DeterministicFakeEmbedding(size=64)
+    vector_store = LegalVectorStore(str(tmp_path))
+    amended, other = splits("Code du travail", 400), splits("Code pénal", 120)
+    upsert(vector_store, "Code du travail", amended, embeddings)
+    upsert(vector_store, "Code pénal", other, embeddings)
+
+    # Ten fewer chunks: their vectors leave the index (or are tombstoned)
+    result = upsert(vector_store, "Code du travail", amended[10:], embeddings)
+    assert result["chunks_removed"] == 10
+    vector_store.save()
+    vector_store = LegalVectorStore.load(str(tmp_path))
+
+    for document in other + amended[10:]:
+        vector = embeddings.embed_query(document.page_content)
+        hits = vector_store.search_by_vector(vector, 1)
+        assert [hit.page_content for hit in hits] == [document.page_content]
+
+def test_ivf_under_an_id_map_tombstones(tmp_path, monkeypatch):
+    # Indexes written before IVF dropped the id map cannot remove vectors safely
+    monkeypatch.setattr(settings, "FAISS_INDEX_TYPE", index_factory.IndexType.IVF_FLAT)
+    embeddings = DeterministicFakeEmbedding(size=64)
+    vector_store = LegalVectorStore(str(tmp_path))
+    vector_store.index = faiss.IndexIDMap2(index_factory.build_index(64, num_vectors=400))
+    amended, other = splits("Code du travail", 400), splits("Code pénal", 120)
+    upsert(vector_store, "Code du travail", amended, embeddings)
+    upsert(vector_store, "Code pénal", other, embeddings)
+    upsert(vector_store, "Code du travail", amended[10:], embeddings)
+
+    assert vector_store.tombstones == 10
+    for document in other:
+        hits = vector_store.search_by_vector(embeddings.embed_query(document.page_content), 1)
+        assert [hit.page_content for hit in hits] == [document.page_content]
+
+def test_ivf_outgrowing_its_training_corpus_is_retrained(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "FAISS_INDEX_TYPE", index_factory.IndexType.IVF_FLAT)
+    embeddings = DeterministicFakeEmbedding(size=64)
+    vector_store = LegalVectorStore(str(tmp_path))
+    upsert(vector_store, "Code du travail", splits("Code du travail", 400), embeddings)
+    first_lists = index_factory.ivf_lists(vector_store.index)
+    assert not vector_store.needs_retraining()
+
+    upsert(vector_store, "Code pénal", splits("Code pénal", 1700), embeddings)
+    assert vector_store.needs_retraining()
+
+    vector_store.compact(EmbeddingPipeline(embeddings))
+    assert not vector_store.needs_retraining()
+    assert index_factory.ivf_lists(vector_store.index) > first_lists
+
+def test_amending_a_document_to_another_documents_content(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=64)
+    vector_store = LegalVectorStore(str(tmp_path))
+    code, copy = splits("Code du travail", 20), splits("Code pénal", 20)
+    upsert(vector_store, "Code du travail", code, embeddings)
+    first = upsert(vector_store, "Code pénal", copy, embeddings)
+
+    # A new upload of existing content is a duplicate; an amendment to it is not
+    assert upsert(vector_store, "Copie", code, embeddings)["status"] == "duplicate"
+    result = upsert(vector_store, "Code pénal", code, embeddings)
+    assert result["status"] == "updated"
+    assert result["document_id"] == first["document_id"]
+    assert result["chunks_removed"] == 20
+    assert upsert(vector_store, "Code pénal", code, embeddings)["status"] == "unchanged"
@@ -1,21 +1,29 @@
-from app.db.database import engine, Base
-from app.models.models import Message
 import logging
+import os
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from app.db.database import engine
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Schema as create_all built it before migrations existed
+BASELINE_REVISION = "0001"
+
+def alembic_config() -> Config:
+    return Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+
 def update_schema():
-    logger.info("Dropping messages table...")
-    try:
-        Message.__table__.drop(engine)
-        logger.info("Messages table dropped.")
-    except Exception as e:
-        logger.warning(f"Could not drop table (might not exist): {e}")
+    config = alembic_config()
+    tables = inspect(engine).get_table_names()
+    if "users" in tables and "alembic_version" not in tables:
+        logger.info("Existing schema without migration history: stamping baseline %s", BASELINE_REVISION)
+        command.stamp(config, BASELINE_REVISION)
 
-    logger.info("Recreating tables...")
-    Base.metadata.create_all(bind=engine)
-    logger.info("Tables created/updated successfully.")
+    logger.info("Applying migrations...")
+    command.upgrade(config, "head")
+    logger.info("Schema is up to date.")
 
 if __name__ == "__main__":
     update_schema()
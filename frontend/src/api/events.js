@@ -0,0 +1,51 @@
+import io from 'socket.io-client';
+import api from './axios';
+
+// Pushes state changes of the current user's appointments and consultations.
+// Call once the lists are loaded; returns a function that unsubscribes.
+export const subscribeUserEvents = (onEvent) => {
+    let cursor = null;
+    let closed = false;
+    // Last event id applied per appointment or consultation. Events are snapshots
+    // and can arrive twice or out of order (replays re-send recent ones), so an
+    // event older than one already applied to the same item is dropped
+    const applied = new Map();
+    const socket = io.connect('http://localhost:8000', {
+        transports: ['websocket'],
+        auth: { token: localStorage.getItem('token') }
+    });
+
+    const replay = () => {
+        if (cursor !== null) {
+            socket.emit('subscribe_events', { after: cursor });
+        }
+    };
+
+    // The cursor is taken before any push can be missed: live events start at connect,
+    // and every reconnect replays what happened while disconnected
+    api.get('/events/').then((response) => {
+        if (closed) return;
+        cursor = response.data.cursor;
+        socket.on('connect', replay);
+        if (socket.connected) replay();
+    }).catch((error) => console.error('Failed to load the event cursor', error));
+
+    socket.on('user_event', (event) => {
+        const key = `${event.type.split('.')[0]}:${event.payload.id}`;
+        if ((applied.get(key) ?? -1) >= event.id) return;
+        applied.set(key, event.id);
+        onEvent(event);
+    });
+
+    socket.on('events_replayed', (data) => {
+        cursor = Math.max(cursor ?? 0, data.cursor);
+        if (data.more) {
+            socket.emit('subscribe_events', { after: data.last_id });
+        }
+    });
+
+    return () => {
+        closed = true;
+        socket.disconnect();
+    };
+};
@@ -13,6 +13,7 @@ const VideoRoom = () => {
     const [idToCall, setIdToCall] = useState("");
     const [callEnded, setCallEnded] = useState(false);
     const [name, setName] = useState("");
+    const [error, setError] = useState("");
     const navigate = useNavigate();
 
     const myVideo = useRef();
@@ -21,7 +22,19 @@ const VideoRoom = () => {
     const socket = useRef();
 
     useEffect(() => {
-        socket.current = io.connect('http://localhost:8000');
+        // websocket only: no sticky sessions needed when the API runs several workers
+        socket.current = io.connect('http://localhost:8000', {
+            transports: ['websocket'],
+            auth: { token: localStorage.getItem('token') }
+        });
+
+        socket.current.on("connect_error", (err) => {
+            setError(err.message);
+        });
+
+        socket.current.on("signaling_error", (data) => {
+            setError(data.detail);
+        });
 
         navigator.mediaDevices.getUserMedia({ video: true, audio: true }).then((stream) => {
             setStream(stream);
@@ -42,6 +55,10 @@ const VideoRoom = () => {
             setCaller(data.caller);
             setCallerSignal(data.sdp);
         });
+
+        return () => {
+            socket.current.disconnect();
+        };
     }, [roomId]);
 
     const callUser = (id) => {
@@ -108,6 +125,7 @@ const VideoRoom = () => {
     return (
         <div className="flex flex-col items-center justify-center min-h-screen bg-gray-900 text-white">
             <h1 className="text-3xl font-bold mb-8">Video Room: {roomId}</h1>
+            {error && <p className="mb-4 text-red-400">{error}</p>}
             <div className="flex flex-wrap justify-center gap-4">
                 <div className="relative">
                     {stream && <video playsInline muted ref={myVideo} autoPlay className="w-[400px] rounded-lg border-2 border-blue-500" />}
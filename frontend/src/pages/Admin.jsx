@@ -39,9 +39,24 @@ const Admin = () => {
                     'Content-Type': 'multipart/form-data',
                 },
             });
+
+            // Ingestion runs as a background job; poll until it finishes
+            let job = response.data;
+            while (job.status === 'queued' || job.status === 'running') {
+                setStatus({
+                    type: 'success',
+                    message: `Ingesting ${file.name}: ${job.pages_loaded} pages loaded, ${job.chunks_embedded}/${job.chunks_total} chunks embedded (${job.index_state}).`
+                });
+                await new Promise((resolve) => setTimeout(resolve, 2000));
+                job = (await api.get(`/admin/ingest/${job.id}`)).data;
+            }
+
+            if (job.status === 'failed') {
+                throw { response: { data: { detail: job.error } } };
+            }
             setStatus({
                 type: 'success',
-                message: `Successfully ingested ${file.name}. Created ${response.data.chunks} chunks.`
+                message: `Successfully ingested ${file.name}. Created ${job.chunks_embedded} chunks.`
             });
             setFile(null);
         } catch (error) {
@@ -10,12 +10,13 @@ const BookAppointment = () => {
     useEffect(() => {
         const fetchAvailability = async () => {
             try {
-                const response = await api.get(`/availability/${expertId}/availability`);
+                // Ready-to-book slots: recurrence expanded and booked times removed server-side
+                const response = await api.get(`/availability/${expertId}/slots`, { params: { days: 14 } });
                 const formattedEvents = response.data.map(slot => ({
-                    id: slot.id,
+                    id: slot.start_time,
                     title: 'Available',
-                    start: new Date(`${new Date().toISOString().split('T')[0]}T${slot.start_time}`), // Simplified
-                    end: new Date(`${new Date().toISOString().split('T')[0]}T${slot.end_time}`),
+                    start: new Date(slot.start_time),
+                    end: new Date(slot.end_time),
                 }));
                 setEvents(formattedEvents);
             } catch (error) {
@@ -34,8 +35,12 @@ const BookAppointment = () => {
                     end_time: event.end.toISOString()
                 });
                 alert("Appointment requested!");
+                setEvents(prev => prev.filter(e => e.id !== event.id));
             } catch (error) {
                 console.error("Error booking appointment", error);
+                if (error.response?.status === 409) {
+                    alert(error.response.data.detail);
+                }
             }
         }
     };
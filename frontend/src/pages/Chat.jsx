@@ -8,6 +8,7 @@ const Chat = () => {
     ]);
     const [input, setInput] = useState('');
     const [loading, setLoading] = useState(false);
+    const [conversationId, setConversationId] = useState(null);
     const messagesEndRef = useRef(null);
 
     const scrollToBottom = () => {
@@ -43,7 +44,11 @@ const Chat = () => {
         setLoading(true);
 
         try {
-            const response = await api.post('/chat/query', { message: userMessage.content });
+            const response = await api.post('/chat/query', {
+                message: userMessage.content,
+                conversation_id: conversationId
+            });
+            setConversationId(response.data.conversation_id);
             const botMessage = {
                 role: 'assistant',
                 content: response.data.response,
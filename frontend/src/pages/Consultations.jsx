@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react';
 import api from '../api/axios';
+import { subscribeUserEvents } from '../api/events';
 import { useAuth } from '../context/AuthContext';
 import { Plus, MessageSquare, CheckCircle, Clock, AlertCircle } from 'lucide-react';
 
@@ -15,6 +16,14 @@ const Consultations = () => {
 
     useEffect(() => {
         fetchConsultations();
+
+        // Assignments and replies arrive as they happen instead of on the next reload
+        return subscribeUserEvents((event) => {
+            if (!event.type.startsWith('consultation.')) return;
+            setConsultations((current) => current.map((c) => (
+                c.id === event.payload.id ? { ...c, ...event.payload } : c
+            )));
+        });
     }, []);
 
     const fetchConsultations = async () => {
@@ -53,6 +62,18 @@ const Consultations = () => {
         }
     };
 
+    const handleClaimNext = async () => {
+        try {
+            const response = await api.post('/consultations/claim');
+            if (response.status === 204) {
+                alert('No open consultations in your domain right now.');
+            }
+            fetchConsultations();
+        } catch (error) {
+            console.error('Failed to claim consultation', error);
+        }
+    };
+
     const handleReply = async (e) => {
         e.preventDefault();
         try {
@@ -90,6 +111,15 @@ const Consultations = () => {
                         New Consultation
                     </button>
                 )}
+                {user?.role === 'expert' && (
+                    <button
+                        onClick={handleClaimNext}
+                        className="flex items-center gap-2 px-4 py-2 bg-indigo-600 text-white rounded-lg hover:bg-indigo-700 transition-colors"
+                    >
+                        <MessageSquare size={20} />
+                        Take Next
+                    </button>
+                )}
             </div>
 
             {loading ? (
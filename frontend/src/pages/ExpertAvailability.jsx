@@ -36,7 +36,8 @@ const ExpertAvailability = () => {
                 start_time: startTime,
                 end_time: endTime,
                 is_recurring: true,
-                day_of_week: start.getDay().toString()
+                // The API counts days from Monday (0) like Python; getDay() starts on Sunday
+                day_of_week: (start.getDay() + 6) % 7
             });
             // Refresh events
             setEvents([...events, { start, end, title: 'Available' }]);
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import api from '../api/axios';
+import { subscribeUserEvents } from '../api/events';
 import { Video, Calendar, Clock } from 'lucide-react';
 
 const MyAppointments = () => {
@@ -16,6 +17,16 @@ const MyAppointments = () => {
             }
         };
         fetchAppointments();
+
+        // Status changes arrive as they happen instead of on the next reload
+        return subscribeUserEvents((event) => {
+            if (!event.type.startsWith('appointment.')) return;
+            setAppointments((current) => (
+                current.some((apt) => apt.id === event.payload.id)
+                    ? current.map((apt) => (apt.id === event.payload.id ? { ...apt, ...event.payload } : apt))
+                    : [...current, event.payload]
+            ));
+        });
     }, []);
 
     return (